@@ -8,18 +8,38 @@ import sys
 import time
 import subprocess
 import threading
+from datetime import datetime, timezone
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from http_cache import ResponseCache
+from response_format import Compressor, listing_response
 
 
 app = Flask(__name__)
 CORS(app)
+Compressor.from_env().init_app(app)
 
 
 # Project root (data files are saved at repo root)
 DATA_DIR = Path(__file__).parent.parent
 
 
+def _csv_versions(filenames):
+    """Version token and Last-Modified from the CSV files' modification times and sizes"""
+    parts, stamps = [], []
+    for name in filenames:
+        try:
+            st = (DATA_DIR / name).stat()
+        except OSError:
+            parts.append(f"{name}:missing")
+            continue
+        parts.append(f"{name}:{st.st_mtime_ns}:{st.st_size}")
+        stamps.append(datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+    return "|".join(parts), max(stamps) if stamps else None
+
+http_cache = ResponseCache(_csv_versions)
+
+
 def read_csv_to_list_of_dicts(filepath: Path) -> List[Dict[str, str]]:
     if not filepath.exists():
         return []
@@ -37,12 +57,14 @@ def health_check():
 
 
 @app.route("/api/rtpi/events")
+@http_cache.cached("rtpi_events.csv")
 def get_rtpi_events():
     filepath = DATA_DIR / "rtpi_events.csv"
     return jsonify(read_csv_to_list_of_dicts(filepath))
 
 
 @app.route("/api/west-lindsey/application")
+@http_cache.cached("west_lindsey_planning.csv")
 def get_west_lindsey_application():
     filepath = DATA_DIR / "west_lindsey_planning.csv"
     data = read_csv_to_list_of_dicts(filepath)
@@ -50,38 +72,44 @@ def get_west_lindsey_application():
 
 
 @app.route("/api/west-lindsey/consultations")
+@http_cache.cached("west_lindsey_consultations.csv")
 def get_west_lindsey_consultations():
     filepath = DATA_DIR / "west_lindsey_consultations.csv"
     return jsonify(read_csv_to_list_of_dicts(filepath))
 
 
 @app.route("/api/peeringdb/ix/gb")
+@http_cache.cached("peeringdb_ix_gb.csv")
 def get_peeringdb_ix_gb():
     filepath = DATA_DIR / "peeringdb_ix_gb.csv"
     return jsonify(read_csv_to_list_of_dicts(filepath))
 
 
 @app.route("/api/peeringdb/fac/gb")
+@http_cache.cached("peeringdb_fac_gb.csv")
 def get_peeringdb_fac_gb():
     filepath = DATA_DIR / "peeringdb_fac_gb.csv"
     return jsonify(read_csv_to_list_of_dicts(filepath))
 
 
 @app.route("/api/planit/datacentres")
+@http_cache.cached("planit_datacentres.csv")
 def get_planit_datacentres():
     filepath = DATA_DIR / "planit_datacentres.csv"
-    return jsonify(read_csv_to_list_of_dicts(filepath))
+    return listing_response(read_csv_to_list_of_dicts(filepath))
 
 @app.route("/api/planit/renewables")
+@http_cache.cached("planit_renewables.csv")
 def get_planit_renewables():
     filepath = DATA_DIR / "planit_renewables.csv"
-    return jsonify(read_csv_to_list_of_dicts(filepath))
+    return listing_response(read_csv_to_list_of_dicts(filepath))
 
 
 @app.route("/api/planit/renewables-test2")
+@http_cache.cached("planit_renewables_test2.csv")
 def get_planit_renewables_test2():
     filepath = DATA_DIR / "planit_renewables_test2.csv"
-    return jsonify(read_csv_to_list_of_dicts(filepath))
+    return listing_response(read_csv_to_list_of_dicts(filepath))
 
 
 # --- Refresh (re-scrape) endpoints ---
@@ -124,6 +152,7 @@ def _refresh(lock_key: str, module: str, csv_filename: str):
         code, out, elapsed = _run_module(module)
         if code != 0:
             return jsonify({"ok": False, "error": "runner_failed", "elapsed_s": elapsed, "log": out[-2000:]}), 500
+        http_cache.invalidate([csv_filename])
         rows = _count_rows(csv_filename)
         return jsonify({"ok": True, "csv": csv_filename, "updated": rows, "elapsed_s": elapsed})
     finally:
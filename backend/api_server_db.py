@@ -1,92 +1,307 @@
 from __future__ import annotations
 
-import sys
-import time
-import subprocess
+import itertools
+import os
 import threading
-from flask import Flask, jsonify, request
+from datetime import datetime
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-from database import db
+from database import db, EXPORT_TABLES, READ_MODELS, SEARCH_SOURCES
+from spatial_index import index_rows, nearby_join
+from http_cache import ResponseCache
+from snapshots import SnapshotStore
+from response_format import Compressor, listing_response
+from export import EXPORT_FORMATS, csv_chunks, ndjson_chunks
+from jobs import JobManager, RefreshSource
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["X-Next-Cursor"])
+compressor = Compressor.from_env()
+compressor.init_app(app)
+
+# USE_ASYNC_DB=1 serves the read endpoints through one shared asyncpg pool on a background loop
+if os.getenv("USE_ASYNC_DB") == "1":
+    from database_async import get_blocking_async_db
+    read_db = get_blocking_async_db(db.query_cache)
+else:
+    read_db = db
+
+
+def _table_versions(tables):
+    """Version token and Last-Modified for the tables (or read models) a response is built from"""
+    versions = [db.table_version(t) for t in tables]
+    token = "|".join(f"{v.get('updated_at')}:{v.get('row_count')}" for v in versions)
+    stamps = [v["updated_at"] for v in versions if isinstance(v.get("updated_at"), datetime)]
+    return token, max(stamps) if stamps else None
+
+http_cache = ResponseCache(_table_versions)
+# Bare requests for the full listings are answered from pre-serialized files (SNAPSHOTS=0 disables)
+snapshots = SnapshotStore(db)
 
 @app.route("/api/health")
 def health_check():
-    return jsonify({"status": "ok"})
+    return jsonify({
+        "status": "ok",
+        "db_pool": db.pool_metrics(),
+        "query_cache": db.query_cache.stats(),
+        "http_cache": http_cache.stats(),
+        "snapshots": snapshots.stats(),
+        "compression": compressor.stats(),
+    })
 
 
 @app.route("/api/west-lindsey/application")
+@snapshots.route("west_lindsey_application")
+@http_cache.cached("west_lindsey_planning")
 def get_west_lindsey_application():
-    return jsonify(db.get_west_lindsey_application())
+    return jsonify(read_db.get_west_lindsey_application())
 
 @app.route("/api/west-lindsey/consultations")
+@snapshots.route("west_lindsey_consultations")
+@http_cache.cached("west_lindsey_consultations")
 def get_west_lindsey_consultations():
-    return jsonify(db.get_west_lindsey_consultations())
+    return jsonify(read_db.get_west_lindsey_consultations())
 
 @app.route("/api/peeringdb/ix/gb")
+@snapshots.route("peeringdb_ix_gb")
+@http_cache.cached("peeringdb_ix_gb")
 def get_peeringdb_ix_gb():
-    return jsonify(db.get_peeringdb_ix_gb())
+    return jsonify(read_db.get_peeringdb_ix_gb())
 
 @app.route("/api/peeringdb/fac/gb")
+@snapshots.route("peeringdb_fac_gb")
+@http_cache.cached("peeringdb_fac_gb")
 def get_peeringdb_fac_gb():
-    return jsonify(db.get_peeringdb_fac_gb())
+    return jsonify(read_db.get_peeringdb_fac_gb())
+
+_PAGE_PARAMS = {"after", "limit", "fields", "area_name", "app_state", "app_type", "decided_from", "decided_to"}
+
+def _planit_listing(listing: str):
+    """
+    Full listing by default. With any of ?after=&limit=&fields= or a filter (area_name,
+    app_state, app_type: comma-separated; from/to, decided_from/decided_to: dates) the
+    listing is served a keyset page at a time; the next page's ?after= is in X-Next-Cursor.
+    ?format=columns returns either as {columns, data, dictionaries} (see response_format.columnar).
+    """
+    args = request.args
+    if not _PAGE_PARAMS & set(args):
+        try:
+            rows = getattr(read_db, f"get_{listing}")(args.get("from"), args.get("to"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return listing_response(rows)
+    filters = {name: [v for v in args.get(name, "").split(",") if v] for name in ("area_name", "app_state", "app_type")}
+    filters.update({
+        "start_from": args.get("from"),
+        "start_to": args.get("to"),
+        "decided_from": args.get("decided_from"),
+        "decided_to": args.get("decided_to"),
+    })
+    fields = [f for f in args.get("fields", "").split(",") if f] or None
+    limit = min(max(args.get("limit", 100, type=int), 1), 1000)
+    try:
+        rows, next_cursor = db.get_planit_page(listing, args.get("after"), limit, fields, filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response = listing_response(rows)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
 
 @app.route("/api/planit/datacentres")
+@snapshots.route("planit_datacentres")
+@http_cache.cached("planit_datacentres_read")
 def get_planit_datacentres():
-    return jsonify(db.get_planit_datacentres())
+    return _planit_listing("planit_datacentres")
 
 @app.route("/api/planit/renewables")
+@snapshots.route("planit_renewables")
+@http_cache.cached("planit_renewables_read")
 def get_planit_renewables():
-    return jsonify(db.get_planit_renewables())
+    return _planit_listing("planit_renewables")
 
 @app.route("/api/planit/renewables-test2")
+@snapshots.route("planit_renewables_test2")
+@http_cache.cached("planit_renewables_read")
 def get_planit_renewables_test2():
-    return jsonify(db.get_planit_renewables_test2())
+    return _planit_listing("planit_renewables_test2")
 
-# --- Refresh (re-scrape) endpoints ---
-_locks: dict[str, threading.Lock] = {
-    k: threading.Lock() for k in [
-        "west-lindsey", "peeringdb-ix", "peeringdb-fac", "planit-dc", "planit-renew", "planit-test2"
-    ]
-}
+@app.route("/api/planit/renewables/as-of")
+@http_cache.cached("planit_renewables")
+def get_planit_renewables_as_of():
+    """Renewables rows as they stood at ?at= (ISO timestamp), optionally only ?uid=...&uid=..."""
+    at = request.args.get("at")
+    if not at:
+        return jsonify({"error": "missing at"}), 400
+    try:
+        rows = db.get_planit_renewables_as_of(at, request.args.getlist("uid"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(rows)
 
-def _run_module(module_name: str) -> tuple[int, str, str]:
-    """Run a python module in the current venv, capture return code, stdout+stderr combined, and elapsed seconds (as string)."""
-    print(f"[Flask] Starting scraper: {module_name}", flush=True)
-    start = time.time()
-    # Change to parent directory to run modules with 60 second timeout
+@app.route("/api/planit/renewables/changes")
+@http_cache.cached("planit_renewables")
+def get_planit_renewables_changes():
+    """Changed columns per version between ?from= and ?to=, optionally filtered by ?columns=a,b and ?uid="""
+    since, until = request.args.get("from"), request.args.get("to")
+    if not since or not until:
+        return jsonify({"error": "missing from/to"}), 400
+    columns = [c for c in request.args.get("columns", "").split(",") if c]
     try:
-        import os
-        parent_dir = os.path.dirname(os.path.dirname(__file__))
-        proc = subprocess.run([sys.executable, "-m", module_name], capture_output=True, text=True, cwd=parent_dir, timeout=45)
-        elapsed = f"{time.time() - start:.2f}"
-        output = (proc.stdout or "") + (proc.stderr or "")
-        print(f"[Flask] Scraper {module_name} completed in {elapsed}s with return code {proc.returncode}", flush=True)
-        if proc.returncode != 0:
-            print(f"[Flask] Error output: {output[-500:]}", flush=True)  # Show last 500 chars of error
-        return proc.returncode, output, elapsed
-    except subprocess.TimeoutExpired:
-        elapsed = f"{time.time() - start:.2f}"
-        print(f"[Flask] Scraper {module_name} TIMED OUT after {elapsed}s", flush=True)
-        return 124, f"Process timed out after 45 seconds", elapsed
-
-def _refresh(lock_key: str, module: str, table_name: str):
-    """Refresh data by running scraper module (scrapers now write directly to database)"""
-    lock = _locks[lock_key]
-    if not lock.acquire(blocking=False):
-        return jsonify({"ok": False, "error": "already_running"}), 409
+        rows = db.get_planit_renewables_changes(since, until, columns, request.args.get("uid"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(rows)
+
+# --- Spatial joins ---
+_SPATIAL_SOURCES = {"datacentres": ["planit_datacentres"], "renewables": ["planit_renewables"]}
+_SPATIAL_SOURCES["all"] = _SPATIAL_SOURCES["datacentres"] + _SPATIAL_SOURCES["renewables"]
+_SPATIAL_TABLES = ("planit_datacentres", "planit_renewables", "peeringdb_fac_gb")
+# Joins are computed at the next of these radii and trimmed, so any radius_km reuses a few joins
+_RADIUS_STEPS_KM = (1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0, 200.0)
+_spatial_lock = threading.Lock()
+_spatial_version = None
+_facility_index = None
+_nearby_cache: dict[tuple, list] = {}
+_nearby_locks: dict[tuple, threading.Lock] = {}
+
+def _clear_spatial_cache():
+    global _spatial_version, _facility_index
+    with _spatial_lock:
+        _spatial_version = None
+        _facility_index = None
+        _nearby_cache.clear()
+        _nearby_locks.clear()
+
+def _nearby_join(source: str, step_km: float, limit: int) -> list:
+    """
+    Cached join (exact distances) of source's sites against the facilities at step_km. Entries are tied to the
+    tables' version token (the one the ETag uses), so writes from other processes, such as the
+    scheduled scrapers or geocode enrichment, are picked up as soon as the ETag changes.
+    Each key is computed under its own lock, so distinct joins don't queue behind each other.
+    """
+    global _spatial_version, _facility_index
+    version, _ = _table_versions(_SPATIAL_TABLES)
+    key = (source, step_km, limit)
+    with _spatial_lock:
+        if version != _spatial_version:
+            _spatial_version, _facility_index = version, None
+            _nearby_cache.clear()
+            _nearby_locks.clear()
+        joined = _nearby_cache.get(key)
+        if joined is not None:
+            return joined
+        key_lock = _nearby_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        with _spatial_lock:
+            joined = _nearby_cache.get(key)
+            facilities = _facility_index
+        if joined is not None:
+            return joined
+        if facilities is None:
+            facilities = index_rows(db.get_coordinates("peeringdb_fac_gb"))
+        joined = []
+        for table in _SPATIAL_SOURCES[source]:
+            for site in nearby_join(db.get_coordinates(table), facilities, step_km, limit, digits=None):
+                site["source"] = table
+                joined.append(site)
+        joined.sort(key=lambda j: j["facilities"][0]["distance_km"])
+        with _spatial_lock:
+            if _spatial_version == version:
+                _facility_index = facilities
+                _nearby_cache[key] = joined
+        return joined
+
+@app.route("/api/spatial/nearby-facilities")
+@http_cache.cached(*_SPATIAL_TABLES)
+def get_nearby_facilities():
+    """PlanIt sites within radius_km of a PeeringDB facility, closest first. Joins are cached per data version."""
+    source = request.args.get("source", "all")
+    if source not in _SPATIAL_SOURCES:
+        return jsonify({"error": f"unknown source, expected one of {sorted(_SPATIAL_SOURCES)}"}), 400
+    radius_km = min(max(request.args.get("radius_km", 10.0, type=float), 0.0), 200.0)
+    limit = min(max(request.args.get("limit", 5, type=int), 1), 50)
+    step_km = next(step for step in _RADIUS_STEPS_KM if step >= radius_km)
+    # Each site's closest `limit` facilities within the step, cut to radius_km, are its closest within radius_km
+    trimmed = []
+    for site in _nearby_join(source, step_km, limit):
+        facilities = [{**f, "distance_km": round(f["distance_km"], 2)}
+                      for f in site["facilities"] if f["distance_km"] <= radius_km]
+        if facilities:
+            trimmed.append({**site, "facilities": facilities})
+    return jsonify(trimmed)
+
+# --- Full-text search ---
+@app.route("/api/search")
+@http_cache.cached("planit_renewables", "planit_datacentres", "west_lindsey_consultations")
+def search():
+    """Ranked full-text hits across PlanIt applications and consultee responses, one page at a time"""
+    text = request.args.get("q", "").strip()
+    if not text:
+        return jsonify({"error": "missing q"}), 400
+    sources = [s for s in request.args.get("source", "").split(",") if s] or None
+    if sources and not set(sources) <= set(SEARCH_SOURCES):
+        return jsonify({"error": f"unknown source, expected any of {sorted(SEARCH_SOURCES)}"}), 400
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    # Fetch one extra hit to know whether another page exists without counting every match
+    hits = db.search(text, sources, limit + 1, offset)
+    return jsonify({
+        "q": text,
+        "results": hits[:limit],
+        "limit": limit,
+        "offset": offset,
+        "next_offset": offset + limit if len(hits) > limit else None,
+    })
+
+# --- Streaming exports ---
+@app.route("/api/export/<table>")
+def export_table(table: str):
+    """
+    Whole table as NDJSON (default) or ?format=csv, streamed from a server-side cursor.
+    The next batch of rows is only fetched once the client has taken the previous chunk,
+    so memory stays flat however large the table is.
+    """
+    if table not in EXPORT_TABLES:
+        return jsonify({"error": f"unknown table, expected one of {sorted(EXPORT_TABLES)}"}), 404
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"unknown format, expected one of {sorted(EXPORT_FORMATS)}"}), 400
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    columns, rows = db.export_rows(table)
+    chunks = csv_chunks(columns, rows) if fmt == "csv" else ndjson_chunks(columns, rows)
+    # Run the query before answering so a failure is a 500, not an empty 200; one later
+    # in the stream aborts the chunked response rather than ending it cleanly
     try:
-        code, out, elapsed = _run_module(module)
-        if code != 0:
-            return jsonify({"ok": False, "error": "runner_failed", "elapsed_s": elapsed, "log": out[-2000:]}), 500
+        first = next(chunks, b"")
+    except Exception:
+        return jsonify({"error": "export failed"}), 500
+    response = Response(itertools.chain([first], chunks), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{table}.{extension}"'
+    # Ask reverse proxies to pass chunks through rather than buffer the whole download
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
-        # Get current count from database
-        row_count = _get_table_count(table_name)
+# --- Refresh (re-scrape) jobs ---
+REFRESH_SOURCES = {
+    "west-lindsey": RefreshSource("backend.scraper.run_west_lindsey", "west_lindsey_consultations", 120),
+    "peeringdb-ix": RefreshSource("backend.scraper.run_peeringdb", "peeringdb_ix_gb", 120),
+    "peeringdb-fac": RefreshSource("backend.scraper.run_peeringdb_fac", "peeringdb_fac_gb", 180),
+    "planit-dc": RefreshSource("backend.scraper.run_planit_api_datacentres", "planit_datacentres", 600),
+    "planit-renew": RefreshSource("backend.scraper.run_planit_renewables_daily", "planit_renewables", 900),
+    "planit-test2": RefreshSource("backend.scraper.run_planit_api_test", "planit_renewables", 600),
+}
+
+def _after_refresh(job) -> dict:
+    """Runs in the job thread once a scraper (which writes directly to the database) exits cleanly"""
+    # The scraper wrote from its own process, so drop this process's cached reads
+    db.invalidate(job.table)
+    # Coordinates may have changed, so drop precomputed spatial joins
+    _clear_spatial_cache()
+    http_cache.invalidate([job.table, *READ_MODELS.get(job.table, [])])
+    return {"updated": _get_table_count(job.table)}
 
-        return jsonify({"ok": True, "table": table_name, "updated": row_count, "elapsed_s": elapsed})
-    finally:
-        lock.release()
+refresh_jobs = JobManager.from_env(REFRESH_SOURCES, os.path.dirname(os.path.dirname(os.path.abspath(__file__))), _after_refresh)
 
 def _get_table_count(table_name: str) -> int:
     """Get current row count from database table"""
@@ -98,29 +313,40 @@ def _get_table_count(table_name: str) -> int:
         return 0
 
 
-@app.post("/api/refresh/west-lindsey")
-def refresh_west_lindsey():
-    return _refresh("west-lindsey", "backend.scraper.run_west_lindsey", "west_lindsey_consultations")
-
-@app.post("/api/refresh/peeringdb-ix")
-def refresh_peeringdb_ix():
-    return _refresh("peeringdb-ix", "backend.scraper.run_peeringdb", "peeringdb_ix_gb")
-
-@app.post("/api/refresh/peeringdb-fac")
-def refresh_peeringdb_fac():
-    return _refresh("peeringdb-fac", "backend.scraper.run_peeringdb_fac", "peeringdb_fac_gb")
+@app.post("/api/refresh/<source>")
+def start_refresh(source: str):
+    """Start a re-scrape in the background (or join the one already running) and return its job at once"""
+    if source not in REFRESH_SOURCES:
+        return jsonify({"ok": False, "error": f"unknown source, expected one of {sorted(REFRESH_SOURCES)}"}), 404
+    job, coalesced = refresh_jobs.submit(source)
+    response = jsonify({"ok": True, "job": job.to_dict(), "coalesced": coalesced})
+    response.status_code = 202
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return response
 
-@app.post("/api/refresh/planit-dc")
-def refresh_planit_dc():
-    return _refresh("planit-dc", "backend.scraper.run_planit_api_datacentres", "planit_datacentres")
+@app.route("/api/jobs")
+def list_jobs():
+    return jsonify([job.to_dict() for job in refresh_jobs.jobs()])
 
-@app.post("/api/refresh/planit-renew")
-def refresh_planit_renew():
-    return _refresh("planit-renew", "backend.scraper.run_planit_renewables_daily", "planit_renewables")
+@app.route("/api/jobs/<job_id>")
+def get_job(job_id: str):
+    """Job status, progress counters, result once finished, and the tail of the scraper's output"""
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job.to_dict(log_lines=50))
 
-@app.post("/api/refresh/planit-test2")
-def refresh_planit_test2():
-    return _refresh("planit-test2", "backend.scraper.run_planit_api_test", "planit_renewables")
+@app.route("/api/jobs/<job_id>/events")
+def job_events(job_id: str):
+    """Server-sent `progress` events as the job advances, ending with a `done` event"""
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return Response(
+        refresh_jobs.events(job),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 if __name__ == "__main__":
     import os
@@ -0,0 +1,167 @@
+"""
+Chunked, parallel, resumable batch writer for large table loads
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+WriteFn = Callable[[str, List[Dict[str, Any]]], bool]
+
+
+def _row_size(row: Dict[str, Any]) -> int:
+    return len(json.dumps(row, default=str))
+
+
+def _chunk_digest(rows: List[Dict[str, Any]]) -> str:
+    return hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class BatchWriter:
+    """
+    Write a large row list to one table in size-bounded chunks.
+
+    Rows are split into chunks of at most `max_rows` rows and roughly `max_bytes` of
+    JSON, and chunks are sent concurrently through `write_fn(table, rows) -> bool`.
+    A failing chunk is split in half until the bad rows are isolated. Those rows go
+    to the quarantine file (JSON lines) and the rest of the chunk is still written.
+    When `abort_after` rows in a row fail on their own, the target is assumed to be
+    down rather than the rows bad, and the load stops; the remaining rows are left
+    unwritten, not quarantined. Only chunks written in full are checkpointed (by
+    content digest), so re-running the same load skips exactly those, and the
+    checkpoint is deleted once a load completes with nothing quarantined.
+    """
+
+    def __init__(self, table: str, write_fn: WriteFn, *, max_rows: int = 500, max_bytes: int = 1_000_000,
+                 workers: int = 4, checkpoint_path: Optional[Path] = None, quarantine_path: Optional[Path] = None,
+                 abort_after: int = 5):
+        self.table = table
+        self.write_fn = write_fn
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.quarantine_path = Path(quarantine_path) if quarantine_path else None
+        self.abort_after = abort_after
+        self._lock = threading.Lock()
+        self._failed_in_a_row = 0
+        self._aborted = threading.Event()
+        self._done: Set[str] = self._load_checkpoint()
+
+    def _load_checkpoint(self) -> Set[str]:
+        if not self.checkpoint_path or not self.checkpoint_path.exists():
+            return set()
+        try:
+            data = json.loads(self.checkpoint_path.read_text())
+            if data.get("table") == self.table:
+                return set(data.get("done", []))
+        except Exception as e:
+            print(f"[BatchWriter] Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+        return set()
+
+    def _save_checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.checkpoint_path.with_name(self.checkpoint_path.name + ".tmp")
+        tmp.write_text(json.dumps({"table": self.table, "done": sorted(self._done)}))
+        os.replace(tmp, self.checkpoint_path)
+
+    def _quarantine(self, row: Dict[str, Any]) -> None:
+        print(f"[BatchWriter] Quarantined 1 {self.table} row that failed on its own")
+        if not self.quarantine_path:
+            return
+        self.quarantine_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.quarantine_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"table": self.table, "failed_at": time.time(), "row": row}, default=str) + "\n")
+
+    def chunk(self, rows: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        chunks: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        current_bytes = 0
+        for row in rows:
+            size = _row_size(row)
+            if current and (len(current) >= self.max_rows or current_bytes + size > self.max_bytes):
+                chunks.append(current)
+                current, current_bytes = [], 0
+            current.append(row)
+            current_bytes += size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _write_isolating(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Write rows, bisecting on failure. Returns written/quarantined/unwritten counts."""
+        if self._aborted.is_set():
+            return {"written": 0, "quarantined": 0, "unwritten": len(rows)}
+        try:
+            ok = self.write_fn(self.table, rows)
+        except Exception as e:
+            print(f"[BatchWriter] Write of {len(rows)} rows raised: {e}")
+            ok = False
+        if ok:
+            with self._lock:
+                self._failed_in_a_row = 0
+            return {"written": len(rows), "quarantined": 0, "unwritten": 0}
+        if len(rows) == 1:
+            with self._lock:
+                self._failed_in_a_row += 1
+                if self._failed_in_a_row >= self.abort_after:
+                    if not self._aborted.is_set():
+                        print(f"[BatchWriter] ❌ {self._failed_in_a_row} {self.table} rows in a row failed on their own, "
+                              f"aborting the load")
+                        self._aborted.set()
+                    return {"written": 0, "quarantined": 0, "unwritten": 1}
+                self._quarantine(rows[0])
+            return {"written": 0, "quarantined": 1, "unwritten": 0}
+        mid = len(rows) // 2
+        left = self._write_isolating(rows[:mid])
+        right = self._write_isolating(rows[mid:])
+        return {k: left[k] + right[k] for k in left}
+
+    def _write_chunk(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        digest = _chunk_digest(rows)
+        if digest in self._done:
+            return {"written": 0, "quarantined": 0, "unwritten": 0, "skipped": len(rows)}
+        result = self._write_isolating(rows)
+        if result["written"] == len(rows):
+            with self._lock:
+                self._done.add(digest)
+                self._save_checkpoint()
+        return {**result, "skipped": 0}
+
+    def write(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Load all rows. Returns counts of written, quarantined, unwritten (left by an
+        abort) and resumed (skipped) rows; the load succeeded only if the quarantined
+        and unwritten counts are both 0.
+        """
+        chunks = self.chunk(rows)
+        totals = {"chunks": len(chunks), "written": 0, "quarantined": 0, "unwritten": 0, "skipped": 0}
+        if not chunks:
+            return totals
+        self._aborted.clear()
+        self._failed_in_a_row = 0
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(chunks))) as pool:
+            for i, result in enumerate(pool.map(self._write_chunk, chunks), start=1):
+                for key in ("written", "quarantined", "unwritten", "skipped"):
+                    totals[key] += result[key]
+                print(f"[BatchWriter] {self.table}: chunk {i}/{len(chunks)} done "
+                      f"({totals['written']} written, {totals['quarantined']} quarantined, {totals['skipped']} resumed)")
+        if self._aborted.is_set():
+            print(f"[BatchWriter] ❌ {self.table}: load aborted, {totals['unwritten']} rows not written; "
+                  f"re-run to resume from the checkpoint")
+        elif not totals["quarantined"]:
+            # Complete and clean: a later load of the same rows should write them again
+            self.reset()
+        return totals
+
+    def reset(self) -> None:
+        """Forget checkpointed progress so the next write() reloads every chunk"""
+        self._done.clear()
+        if self.checkpoint_path and self.checkpoint_path.exists():
+            self.checkpoint_path.unlink()
@@ -0,0 +1,62 @@
+"""
+EXPLAIN every API endpoint query and report whether its plan can use an index.
+
+Sequential scans are disabled for the check so the planner shows whether a matching
+index exists at all (on small tables it would otherwise prefer a seq scan anyway).
+Exits non-zero if any endpoint query still falls back to a sequential scan.
+"""
+import json
+import sys
+from typing import Any, Dict, List
+
+from database import db, ENDPOINT_QUERIES, SupabaseDB
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+# ?start_from/?start_to variants of the PlanIt endpoints: range scans on the read models'
+# start_date indexes (the read models aren't partitioned, so there is nothing to prune)
+BOUNDED_QUERIES = {
+    f"{name} (start_date bounded)": SupabaseDB._start_date_bounded(ENDPOINT_QUERIES[name], "2024-01-01", "2024-12-31")
+    for name in ('planit_datacentres', 'planit_renewables', 'planit_renewables_test2')
+}
+
+
+def _node_types(plan: Dict[str, Any]) -> List[str]:
+    types = [plan.get("Node Type", "")]
+    for child in plan.get("Plans", []):
+        types.extend(_node_types(child))
+    return types
+
+
+def explain(query: str, params: tuple = None) -> Dict[str, Any]:
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+            result = cursor.fetchone()[0]
+        conn.rollback()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+def check_endpoint_indexes(queries: Dict[str, Any] = ENDPOINT_QUERIES) -> bool:
+    """queries maps a name to SQL, or to a (SQL, params) tuple"""
+    all_ok = True
+    for name, query in queries.items():
+        query, params = (query, None) if isinstance(query, str) else query
+        try:
+            types = _node_types(explain(query, params))
+        except Exception as e:
+            print(f"❌ {name}: EXPLAIN failed: {e}")
+            all_ok = False
+            continue
+        uses_index = any(t in INDEX_NODES for t in types)
+        ok = uses_index and "Seq Scan" not in types
+        all_ok = all_ok and ok
+        print(f"{'✅' if ok else '❌'} {name}: {' -> '.join(types)}")
+    return all_ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_endpoint_indexes({**ENDPOINT_QUERIES, **BOUNDED_QUERIES}) else 1)
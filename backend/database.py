@@ -1,16 +1,450 @@
 """
 Database module for Supabase integration
 """
+import base64
+import io
+import itertools
+import json
 import os
-from typing import List, Dict, Any, Optional
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
+from psycopg2 import sql
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# SQL behind each API endpoint (backend/check_indexes.py EXPLAINs these to verify index use)
+ENDPOINT_QUERIES = {
+    'west_lindsey_application': "SELECT * FROM west_lindsey_planning ORDER BY created_at DESC LIMIT 1",
+    'west_lindsey_consultations': "SELECT * FROM west_lindsey_consultations ORDER BY original_created_time DESC NULLS LAST",
+    'peeringdb_ix_gb': "SELECT * FROM peeringdb_ix_gb ORDER BY name",
+    'peeringdb_fac_gb': "SELECT * FROM peeringdb_fac_gb ORDER BY name",
+    'planit_datacentres': "SELECT * FROM planit_datacentres_read ORDER BY last_scraped DESC NULLS LAST",
+    'planit_renewables': "SELECT * FROM planit_renewables_read ORDER BY last_scraped DESC NULLS LAST",
+    'planit_renewables_test2': "SELECT * FROM planit_renewables_read ORDER BY start_date DESC NULLS LAST, last_scraped DESC NULLS LAST",
+}
+
+# Materialized read models built from each base table (database/migrations/003_read_models.sql)
+READ_MODELS = {
+    'planit_renewables': ['planit_renewables_read'],
+    'planit_datacentres': ['planit_datacentres_read'],
+}
+
+# Paginated PlanIt listings: read model, sort keys (all DESC NULLS LAST, then id DESC for a
+# unique keyset) and the columns ?fields= may select
+_PLANIT_COMMON_COLUMNS = [
+    'id', 'uid', 'name', 'scraper_name', 'description', 'address', 'postcode', 'url', 'app_size',
+    'app_state', 'app_type', 'start_date', 'decided_date', 'area_name', 'latitude', 'longitude',
+    'last_scraped', 'created_at', 'updated_at', 'lat', 'lng', 'link',
+]
+_RENEWABLES_COLUMNS = _PLANIT_COMMON_COLUMNS + [
+    'consulted_date', 'location_x', 'location_y', 'other_fields', 'last_different', 'last_changed', 'is_new',
+]
+PLANIT_LISTINGS = {
+    'planit_renewables': ('planit_renewables_read', ['last_scraped'], _RENEWABLES_COLUMNS),
+    'planit_renewables_test2': ('planit_renewables_read', ['start_date', 'last_scraped'], _RENEWABLES_COLUMNS),
+    'planit_datacentres': ('planit_datacentres_read', ['last_scraped'], _PLANIT_COMMON_COLUMNS),
+}
+# Filters accepted by get_planit_page: name -> (column, operator); list filters match any value
+PLANIT_FILTERS = {
+    'area_name': ('area_name', 'in'),
+    'app_state': ('app_state', 'in'),
+    'app_type': ('app_type', 'in'),
+    'start_from': ('start_date', '>='),
+    'start_to': ('start_date', '<='),
+    'decided_from': ('decided_date', '>='),
+    'decided_to': ('decided_date', '<='),
+}
+
+
+def _iso_date(value: str) -> str:
+    """value, if it's a YYYY-MM-DD date; ValueError otherwise (so bad input isn't a query error)"""
+    try:
+        date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid date: {value!r}") from None
+    return value
+
+def _iso_timestamp(value: str) -> str:
+    """value, if it's an ISO 8601 date or timestamp (a trailing Z allowed); ValueError otherwise"""
+    try:
+        datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f"invalid timestamp: {value!r}") from None
+    return value
+
+# Tables /api/export/<table> streams: table -> (columns, relation read), rows in id order
+_TIMESTAMPS = ['created_at', 'updated_at']
+EXPORT_TABLES = {
+    'planit_renewables': (_RENEWABLES_COLUMNS, 'planit_renewables_read'),
+    'planit_datacentres': (_PLANIT_COMMON_COLUMNS, 'planit_datacentres_read'),
+    'west_lindsey_planning': (['id', 'reference', 'title', 'description', 'address', 'postcode', 'status',
+                               'decision', 'received_date', 'decided_date'] + _TIMESTAMPS, 'west_lindsey_planning'),
+    'west_lindsey_consultations': (['id', 'title', 'description', 'consultation_start', 'consultation_end', 'status',
+                                    'url', 'original_created_time', 'original_last_modified_time', 'consultation_id',
+                                    'application_id', 'response_published', 'consultee_name', 'consultee_email',
+                                    'consultee_address'] + _TIMESTAMPS, 'west_lindsey_consultations'),
+    'peeringdb_ix_gb': (['id', 'peeringdb_id', 'name', 'city', 'country', 'region_continent', 'latitude',
+                         'longitude'] + _TIMESTAMPS, 'peeringdb_ix_gb'),
+    'peeringdb_fac_gb': (['id', 'peeringdb_id', 'name', 'city', 'country', 'address1', 'address2', 'zipcode',
+                          'latitude', 'longitude'] + _TIMESTAMPS, 'peeringdb_fac_gb'),
+}
+
+
+def _encode_cursor(values: List[Any]) -> str:
+    plain = [v.isoformat() if hasattr(v, 'isoformat') else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(plain, default=str).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("invalid cursor")
+    return values
+
+
+def _keyset_after(sort: List[str], values: List[Any]) -> tuple:
+    """
+    WHERE clause selecting rows after `values` in ORDER BY sort DESC NULLS LAST, id DESC.
+    Built from IS NULL / = / < comparisons so NULL sort values page correctly on any backend.
+    """
+    clauses, params = [], []
+    prefix, prefix_params = [], []
+    for column, value in zip(sort, values):
+        if value is not None:
+            clauses.append(" AND ".join(prefix + [f"({column} < %s OR {column} IS NULL)"]))
+            params += prefix_params + [value]
+            prefix.append(f"{column} = %s")
+            prefix_params.append(value)
+        else:
+            prefix.append(f"{column} IS NULL")
+    clauses.append(" AND ".join(prefix + ["id < %s"]))
+    params += prefix_params + [values[-1]]
+    return "(" + " OR ".join(f"({c})" for c in clauses) + ")", params
+
+
+# Full-text search sources (database/migrations/004_full_text_search.sql): one SELECT per
+# table producing the common hit columns, filtered on the table's GIN-indexed search_vector
+SEARCH_SOURCES = {
+    'renewables': (
+        "SELECT 'renewables' AS source, id, uid AS key, COALESCE(NULLIF(name, ''), uid) AS title,"
+        " area_name AS area, NULLIF(start_date, 'infinity')::text AS date, url, description AS body,"
+        " ts_rank_cd(search_vector, q.query) AS rank"
+        " FROM planit_renewables, q WHERE search_vector @@ q.query"
+    ),
+    'datacentres': (
+        "SELECT 'datacentres' AS source, id, uid AS key, COALESCE(NULLIF(name, ''), uid) AS title,"
+        " area_name AS area, NULLIF(start_date, 'infinity')::text AS date, url, description AS body,"
+        " ts_rank_cd(search_vector, q.query) AS rank"
+        " FROM planit_datacentres, q WHERE search_vector @@ q.query"
+    ),
+    'consultations': (
+        "SELECT 'consultations' AS source, id, consultation_id::text AS key,"
+        " COALESCE(NULLIF(consultee_name, ''), title) AS title, NULL AS area,"
+        " original_created_time::date::text AS date, url, description AS body,"
+        " ts_rank_cd(search_vector, q.query) AS rank"
+        " FROM west_lindsey_consultations, q WHERE search_vector @@ q.query"
+    ),
+}
+
+
+def consultation_frontend_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Map consultation DB fields back to the original CSV field names the frontend expects"""
+    item['consulteeName'] = item.get('consultee_name') or item.get('title', '')
+    item['opinion'] = item.get('status', '')
+    item['responseDetailsToPublish'] = item.get('description', '')
+    item['responsePublished'] = item.get('response_published', '0')
+    item['createdTime'] = item.get('original_created_time', '')
+    item['lastModifiedTime'] = item.get('original_last_modified_time', '')
+    item['consulteeEmail'] = item.get('consultee_email', '')
+    item['consulteeAddress'] = item.get('consultee_address', '')
+    item['id'] = item.get('consultation_id') or item.get('id')
+    item['applicationId'] = item.get('application_id', '')
+    item.pop('search_vector', None)
+    return item
+
+
+def _copy_text_value(value: Any) -> str:
+    """Encode one value for COPY ... FROM STDIN in PostgreSQL text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    text = str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+_READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+([a-z_][a-z0-9_]*)", re.IGNORECASE)
+_WRITE_TABLES = re.compile(
+    r"\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?|ALTER\s+TABLE|REFRESH\s+MATERIALIZED\s+VIEW(?:\s+CONCURRENTLY)?)"
+    r"\s+(?:ONLY\s+)?([a-z_][a-z0-9_]*)",
+    re.IGNORECASE,
+)
+# Read model -> the base table it is built from, so base-table writes invalidate view reads
+_READ_MODEL_BASES = {view: table for table, views in READ_MODELS.items() for view in views}
+
+
+def tables_read(query: str) -> set:
+    """Base tables a SELECT depends on (read models resolve to their source table)"""
+    return {_READ_MODEL_BASES.get(t.lower(), t.lower()) for t in _READ_TABLES.findall(query)}
+
+
+def tables_written(query: str) -> set:
+    """Base tables a DML/DDL statement touches; empty when they can't be determined"""
+    return {_READ_MODEL_BASES.get(t.lower(), t.lower()) for t in _WRITE_TABLES.findall(query)}
+
+
+class QueryCache:
+    """
+    LRU cache of SELECT results keyed by (SQL, params) and tagged with the tables read.
+
+    Bounded by entry count and by total cached rows; entries also expire after `ttl`
+    seconds so writes made by other processes (scheduled scrapers) show up eventually.
+    Cached result lists are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 128, max_rows: int = 500_000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (expires_at, tags, rows)
+        self._rows = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "QueryCache":
+        return cls(
+            max_entries=int(os.getenv('QUERY_CACHE_MAX_ENTRIES', '128')),
+            max_rows=int(os.getenv('QUERY_CACHE_MAX_ROWS', '500000')),
+            ttl=float(os.getenv('QUERY_CACHE_TTL', '300')),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: tuple) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: tuple, tags: set, rows: List[Dict[str, Any]]) -> None:
+        if len(rows) > self.max_rows:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tags, rows)
+            self._rows += len(rows)
+            while self._entries and (len(self._entries) > self.max_entries or self._rows > self.max_rows):
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: tuple) -> None:
+        _, _, rows = self._entries.pop(key)
+        self._rows -= len(rows)
+
+    def invalidate(self, tables: Optional[set] = None) -> None:
+        """Drop entries reading any of tables, or everything when tables is None"""
+        with self._lock:
+            stale = [k for k, (_, tags, _) in self._entries.items() if tables is None or tags & tables]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "rows": self._rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool.
+
+    Keeps between min_size and max_size connections. Callers beyond max_size wait up to
+    `timeout` seconds for a free connection. Idle connections are health-checked with
+    SELECT 1 before reuse once they have sat longer than `check_interval`, and
+    connections older than `max_lifetime` are recycled.
+    """
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10, timeout: float = 10.0,
+                 check_interval: float = 30.0, max_lifetime: float = 1800.0):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.max_lifetime = max_lifetime
+        self._cond = threading.Condition()
+        self._idle: deque = deque()  # (conn, last_used)
+        self._created_at: Dict[int, float] = {}
+        self._size = 0
+        self._metrics = {
+            "checkouts": 0, "reused": 0, "created": 0, "discarded": 0,
+            "health_check_failures": 0, "waits": 0, "timeouts": 0, "wait_seconds": 0.0,
+        }
+        for _ in range(min(min_size, self.max_size)):
+            try:
+                conn = self._connect()
+                self._idle.append((conn, time.monotonic()))
+            except Exception as e:
+                print(f"Failed to pre-open pooled connection: {e}")
+                break
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        self._created_at[id(conn)] = time.monotonic()
+        self._size += 1
+        self._metrics["created"] += 1
+        return conn
+
+    def _discard(self, conn) -> None:
+        self._created_at.pop(id(conn), None)
+        self._size -= 1
+        self._metrics["discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if now - self._created_at.get(id(conn), now) > self.max_lifetime:
+            return False
+        if now - last_used < self.check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            self._metrics["health_check_failures"] += 1
+            return False
+
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            self._metrics["checkouts"] += 1
+            waited_from = None
+            while True:
+                while self._idle:
+                    conn, last_used = self._idle.pop()
+                    if self._healthy(conn, last_used):
+                        self._metrics["reused"] += 1
+                        break
+                    self._discard(conn)
+                else:
+                    conn = None
+                if conn is None and self._size < self.max_size:
+                    conn = self._connect()
+                if conn is not None:
+                    if waited_from is not None:
+                        self._metrics["wait_seconds"] += time.monotonic() - waited_from
+                    return conn
+                if waited_from is None:
+                    waited_from = time.monotonic()
+                    self._metrics["waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics["timeouts"] += 1
+                    raise PoolTimeout(f"No database connection free after {self.timeout}s")
+                self._cond.wait(remaining)
+
+    def putconn(self, conn) -> None:
+        with self._cond:
+            broken = conn.closed or conn.info.transaction_status not in (
+                psycopg2.extensions.TRANSACTION_STATUS_IDLE,
+            )
+            if broken and not conn.closed:
+                try:
+                    conn.rollback()
+                    broken = conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+                except Exception:
+                    broken = True
+            if broken:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; commit on success, roll back on error, then return it"""
+        conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            self.putconn(conn)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self._metrics,
+                "wait_seconds": round(self._metrics["wait_seconds"], 3),
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            }
+
+    def close(self) -> None:
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+
+
 class SupabaseDB:
     def __init__(self):
         self.supabase_url = os.getenv('SUPABASE_URL')
@@ -23,48 +457,278 @@ class SupabaseDB:
         else:
             self.supabase = None
 
-        # Initialize direct PostgreSQL connection for complex queries
-        self.conn = None
+        self._partitioned: Dict[str, bool] = {}
+        # Result cache for the read endpoints (QUERY_CACHE_TTL=0 disables it)
+        self.query_cache = QueryCache.from_env()
+
+        # Unique names for server-side cursors (itertools.count is atomic under the GIL)
+        self._stream_ids = itertools.count(1)
+
+        # Pooled PostgreSQL connections for direct queries (sized via DB_POOL_* env vars)
+        self.pool = None
         if self.database_url:
             try:
-                self.conn = psycopg2.connect(self.database_url)
+                self.pool = ConnectionPool(
+                    self.database_url,
+                    min_size=int(os.getenv('DB_POOL_MIN', '1')),
+                    max_size=int(os.getenv('DB_POOL_MAX', '10')),
+                    timeout=float(os.getenv('DB_POOL_TIMEOUT', '10')),
+                    check_interval=float(os.getenv('DB_POOL_CHECK_INTERVAL', '30')),
+                    max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+                )
             except Exception as e:
-                print(f"Failed to connect to database: {e}")
+                print(f"Failed to create connection pool: {e}")
 
     def get_connection(self):
-        """Get a fresh database connection"""
+        """Get a fresh, unpooled database connection (caller must close it)"""
         if self.database_url:
             return psycopg2.connect(self.database_url)
         return None
 
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of a with-block"""
+        if self.pool is None:
+            raise RuntimeError("DATABASE_URL is not configured")
+        with self.pool.connection() as conn:
+            yield conn
+
+    def pool_metrics(self) -> Dict[str, Any]:
+        return self.pool.metrics() if self.pool else {}
+
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results as list of dicts"""
         try:
-            with self.get_connection() as conn:
+            with self.connection() as conn:
                 with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                     cursor.execute(query, params)
-                    return [dict(row) for row in cursor.fetchall()]
+                    # RealDictRow is already a dict; copying each row would double peak memory
+                    return cursor.fetchall()
         except Exception as e:
             print(f"Query failed: {e}")
             return []
 
+    def cached_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """execute_query through the result cache; failed (empty) reads are not cached"""
+        if not self.query_cache.enabled:
+            return self.execute_query(query, params)
+        key = (query, params)
+        results = self.query_cache.get(key)
+        if results is None:
+            results = self.execute_query(query, params)
+            if results:
+                self.query_cache.put(key, tables_read(query), results)
+        return results
+
+    def table_version(self, table: str) -> Dict[str, Any]:
+        """Latest updated_at and row count of table; changes whenever its data does (read via the cache)"""
+        rows = self.cached_query(f"SELECT MAX(updated_at) AS updated_at, COUNT(*) AS row_count FROM {table}")
+        return rows[0] if rows else {}
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Drop cached reads of table (a read model counts as its base table), or the whole cache"""
+        self.query_cache.invalidate({_READ_MODEL_BASES.get(table, table)} if table else None)
+
+    def _invalidate_written(self, query: str) -> None:
+        # Unparseable statements (DDL, functions) may touch anything, so clear everything
+        self.query_cache.invalidate(tables_written(query) or None)
+
+    def execute_stream(self, query: str, params: tuple = None, itersize: int = None,
+                       as_dict: bool = True) -> Iterator[Union[Dict[str, Any], tuple]]:
+        """
+        Lazily yield the rows of a SELECT through a named (server-side) cursor.
+
+        Rows arrive from Postgres `itersize` at a time (DB_STREAM_ITERSIZE, default 2000),
+        so walking a whole table needs memory for one batch, not the result set. Yields
+        dicts, or plain tuples with as_dict=False. The pooled connection stays checked out
+        until the generator is exhausted or closed. Errors are logged and re-raised, so a
+        failed stream can't pass for a complete (shorter) result.
+        """
+        name = f"stream_{next(self._stream_ids)}"
+        factory = psycopg2.extras.RealDictCursor if as_dict else None
+        try:
+            with self.connection() as conn:
+                with conn.cursor(name=name, cursor_factory=factory) as cursor:
+                    cursor.itersize = itersize or int(os.getenv('DB_STREAM_ITERSIZE', '2000'))
+                    cursor.execute(query, params)
+                    yield from cursor
+        except Exception as e:
+            print(f"Streaming query failed: {e}")
+            raise
+
     def execute_raw(self, query: str, params: tuple = None) -> bool:
         """Execute a raw SQL query (DDL/DML)"""
         try:
-            with self.get_connection() as conn:
+            with self.connection() as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(query, params)
                     conn.commit()
+                    self._invalidate_written(query)
                     return True
         except Exception as e:
             print(f"Raw query failed: {e}")
             return False
 
+    def execute_values(self, query: str, rows: List[tuple], template: str = None, page_size: int = 1000) -> int:
+        """Execute a bulk statement with a VALUES %s placeholder, returning rows affected"""
+        if not rows:
+            return 0
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    affected = 0
+                    # One statement per page so rowcount can be summed across pages
+                    for i in range(0, len(rows), page_size):
+                        page = rows[i:i + page_size]
+                        psycopg2.extras.execute_values(cursor, query, page, template=template, page_size=len(page))
+                        affected += cursor.rowcount
+                    conn.commit()
+                    self._invalidate_written(query)
+                    return affected
+        except Exception as e:
+            print(f"Bulk query failed: {e}")
+            return 0
+
+    def bulk_upsert(self, table: str, data: List[Dict[str, Any]], conflict_columns: List[str] = None) -> Optional[Dict[str, int]]:
+        """
+        Postgres-native bulk upsert for migrations and backfills.
+
+        COPYs the rows into a temporary staging table, then runs a single
+        INSERT ... ON CONFLICT (conflict_columns) DO UPDATE from it. Rows repeating a
+        conflict key keep the last occurrence. Returns {"inserted": n, "updated": m},
+        or None if the load failed (nothing is written in that case).
+
+        Partitioned tables have no unique key to conflict on (uid uniqueness is kept by
+        the triggers of migration 007), so there the staged rows UPDATE the rows matching
+        their conflict key and the rest are INSERTed, under a per-table advisory lock so
+        concurrent writers can't both insert the same new uid.
+        """
+        if not data:
+            return {"inserted": 0, "updated": 0}
+        conflict_columns = conflict_columns or ['uid']
+        columns: List[str] = []
+        for row in data:
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+        update_columns = [c for c in columns if c not in conflict_columns]
+
+        buf = io.StringIO()
+        for row in data:
+            buf.write("\t".join(_copy_text_value(row.get(c)) for c in columns))
+            buf.write("\n")
+        buf.seek(0)
+
+        stage = sql.Identifier(f"_stage_{table}")
+        cols = sql.SQL(", ").join(map(sql.Identifier, columns))
+        conflict = sql.SQL(", ").join(map(sql.Identifier, conflict_columns))
+        if update_columns:
+            action = sql.SQL("DO UPDATE SET ") + sql.SQL(", ").join(
+                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c)) for c in update_columns
+            )
+        else:
+            action = sql.SQL("DO NOTHING")
+        deduped = sql.SQL("SELECT DISTINCT ON ({conflict}) {cols} FROM {stage} ORDER BY {conflict}, ctid DESC").format(
+            conflict=conflict, cols=cols, stage=stage)
+        partitioned = self.is_partitioned(table)
+        if partitioned:
+            match = sql.SQL(" AND ").join(sql.SQL("t.{0} = s.{0}").format(sql.Identifier(c)) for c in conflict_columns)
+            update = sql.SQL("UPDATE {table} AS t SET {assignments} FROM ({deduped}) AS s WHERE {match}").format(
+                table=sql.Identifier(table), deduped=deduped, match=match,
+                assignments=sql.SQL(", ").join(
+                    sql.SQL("{0} = s.{0}").format(sql.Identifier(c)) for c in update_columns
+                ),
+            )
+            insert = sql.SQL(
+                "INSERT INTO {table} ({cols}) SELECT {cols} FROM ({deduped}) AS s "
+                "WHERE NOT EXISTS (SELECT 1 FROM {table} AS t WHERE {match})"
+            ).format(table=sql.Identifier(table), cols=cols, deduped=deduped, match=match)
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql.SQL(
+                        "CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {cols} FROM {table} WITH NO DATA"
+                    ).format(stage=stage, cols=cols, table=sql.Identifier(table)))
+                    cursor.copy_expert(
+                        sql.SQL("COPY {stage} ({cols}) FROM STDIN").format(stage=stage, cols=cols).as_string(conn),
+                        buf,
+                    )
+                    if partitioned:
+                        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (table,))
+                        updated = 0
+                        if update_columns:
+                            cursor.execute(update)
+                            updated = cursor.rowcount
+                        cursor.execute(insert)
+                        counts = {"inserted": cursor.rowcount, "updated": updated}
+                    else:
+                        # xmax = 0 only for freshly inserted tuples, so it splits inserts from updates
+                        cursor.execute(sql.SQL(
+                            "INSERT INTO {table} ({cols}) {deduped} ON CONFLICT ({conflict}) {action} "
+                            "RETURNING (xmax = 0)"
+                        ).format(table=sql.Identifier(table), cols=cols, deduped=deduped, conflict=conflict, action=action))
+                        flags = [r[0] for r in cursor.fetchall()]
+                        inserted = sum(1 for f in flags if f)
+                        counts = {"inserted": inserted, "updated": len(flags) - inserted}
+                    conn.commit()
+            self.invalidate(table)
+            return counts
+        except Exception as e:
+            print(f"Bulk upsert into {table} failed: {e}")
+            return None
+
+    def unknown_keys(self, table: str, column: str, keys: List[Any], key_type: str = 'text') -> List[Any]:
+        """
+        Return the candidate keys that are not yet present in table.column.
+
+        The anti-join runs in Postgres over just the candidate batch, so the cost of
+        new-record detection scales with the batch rather than the table. A failed lookup
+        raises: returning [] would mark every candidate as already known.
+        """
+        if key_type not in ('text', 'integer', 'bigint'):
+            raise ValueError(f"Unsupported key type: {key_type}")
+        keys = list(dict.fromkeys(k for k in keys if k not in (None, '')))
+        if not keys:
+            return []
+        query = sql.SQL(
+            "SELECT k FROM unnest(%s::{key_type}[]) AS k "
+            "WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{column} = k)"
+        ).format(key_type=sql.SQL(key_type), table=sql.Identifier(table), column=sql.Identifier(column))
+        return [row['k'] for row in self.execute_stream(query, (keys,))]
+
+    def select_by_keys(self, table: str, columns: List[str], key_columns: List[str], keys: List[Any]) -> List[Dict[str, Any]]:
+        """Fetch `columns` for rows whose value in any of `key_columns` is among `keys` (raises on failure)"""
+        keys = list(dict.fromkeys(k for k in keys if k not in (None, '')))
+        if not keys:
+            return []
+        query = sql.SQL("SELECT {columns} FROM {table} WHERE {where}").format(
+            columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+            table=sql.Identifier(table),
+            where=sql.SQL(" OR ").join(sql.SQL("{} = ANY(%s)").format(sql.Identifier(c)) for c in key_columns),
+        )
+        # execute_stream re-raises, so a failed lookup can't pass for "nothing matched"
+        return list(self.execute_stream(query, tuple(keys for _ in key_columns)))
+
+    def update_coordinates(self, table: str, values: List[tuple]) -> int:
+        """Set latitude/longitude from (id, lat, lng) tuples in one statement, returning rows updated"""
+        return self.execute_values(
+            f"UPDATE {table} AS t SET latitude = v.lat, longitude = v.lng "
+            "FROM (VALUES %s) AS v(id, lat, lng) WHERE t.id = v.id",
+            values,
+            template="(%s, %s::double precision, %s::double precision)",
+        )
+
+    def count_rows(self, table: str) -> int:
+        result = self.execute_query(sql.SQL("SELECT COUNT(*) AS count FROM {}").format(sql.Identifier(table)))
+        return result[0]['count'] if result else 0
+
     def execute_insert(self, table: str, data: Dict[str, Any]) -> bool:
         """Insert data into table"""
         try:
             if self.supabase:
                 result = self.supabase.table(table).insert(data).execute()
+                # Invalidate once the write is committed, so a concurrent read can't re-cache old rows
+                self.invalidate(table)
                 return bool(result.data)
         except Exception as e:
             print(f"Insert failed: {e}")
@@ -72,106 +736,256 @@ class SupabaseDB:
 
     def execute_upsert(self, table: str, data: List[Dict[str, Any]], conflict_columns: List[str] = None) -> bool:
         """Upsert data into table (insert or update on conflict)"""
+        if self.pool is not None and self.is_partitioned(table):
+            # PostgREST upserts need a unique key to conflict on, which partitioned tables lack
+            return self.bulk_upsert(table, data, conflict_columns or ['uid']) is not None
         try:
             if self.supabase:
-                # Use simple upsert without on_conflict specification
-                result = self.supabase.table(table).upsert(data).execute()
+                if conflict_columns:
+                    result = self.supabase.table(table).upsert(data, on_conflict=",".join(conflict_columns)).execute()
+                else:
+                    # Use simple upsert without on_conflict specification
+                    result = self.supabase.table(table).upsert(data).execute()
+                # Invalidate once the write is committed, so a concurrent read can't re-cache old rows
+                self.invalidate(table)
                 return bool(result.data)
         except Exception as e:
             print(f"Upsert failed: {e}")
             # Try regular insert if upsert fails
             try:
                 result = self.supabase.table(table).insert(data).execute()
+                self.invalidate(table)
                 return bool(result.data)
             except Exception as e2:
                 print(f"Insert also failed: {e2}")
         return False
 
+    # Partitioning (see database/migrations/002_partition_planit.sql)
+
+    def is_partitioned(self, table: str) -> bool:
+        """Whether table is a declaratively partitioned parent (cached per process)"""
+        if table not in self._partitioned:
+            result = self.execute_query(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)) AS partitioned",
+                (table,),
+            )
+            self._partitioned[table] = bool(result and result[0]['partitioned'])
+        return self._partitioned[table]
+
+    def ensure_partitions(self, table: str, dates: List[Any]) -> None:
+        """Create the yearly partitions needed for these start_dates before rows are written"""
+        if not self.is_partitioned(table):
+            return
+        years = sorted({int(str(d)[:4]) for d in dates if d and str(d)[:4].isdigit()})
+        if not years:
+            return
+        # One statement for all years; new (empty) partitions change no results, so nothing is invalidated
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT ensure_yearly_partition(%s, make_date(y, 1, 1)) FROM unnest(%s::int[]) AS y",
+                        (table, years),
+                    )
+        except Exception as e:
+            print(f"Creating partitions of {table} failed: {e}")
+
+    @staticmethod
+    def _start_date_bounded(query: str, start_from: Optional[str], start_to: Optional[str]) -> tuple:
+        """
+        Add start_date bounds to an endpoint query.
+
+        The PlanIt endpoints read the (unpartitioned) read models, so the bounds are served
+        by their start_date indexes rather than by partition pruning; partitioning only
+        keeps the base tables' writes and retention per year. Undated rows never match.
+        Raises ValueError for a bound that isn't a YYYY-MM-DD date.
+        """
+        conditions, params = [], []
+        if start_from:
+            conditions.append("start_date >= %s")
+            params.append(_iso_date(start_from))
+        if start_to:
+            conditions.append("start_date <= %s")
+            params.append(_iso_date(start_to))
+        if not conditions:
+            return query, None
+        head, order = query.split(" ORDER BY ", 1)
+        return f"{head} WHERE {' AND '.join(conditions)} ORDER BY {order}", tuple(params)
+
+    def refresh_read_models(self, table: str) -> bool:
+        """Rebuild the read models derived from table without blocking readers"""
+        ok = True
+        for view in READ_MODELS.get(table, []):
+            start = time.time()
+            if self.execute_raw(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"):
+                print(f"[DB] Refreshed {view} in {time.time() - start:.2f}s")
+            else:
+                ok = False
+        return ok
+
+    def search(self, text: str, sources: List[str] = None, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Ranked full-text search across the SEARCH_SOURCES tables.
+
+        `text` uses web-search syntax ("quoted phrases", OR, -exclusions). Hits are ordered
+        by ts_rank_cd, and snippets are highlighted only for the returned page.
+        """
+        selects = [SEARCH_SOURCES[s] for s in (sources or SEARCH_SOURCES) if s in SEARCH_SOURCES]
+        if not text.strip() or not selects:
+            return []
+        query = (
+            "WITH q AS (SELECT websearch_to_tsquery('english', %s) AS query) "
+            "SELECT source, id, key, title, area, date, url, rank,"
+            " ts_headline('english', coalesce(body, ''), q.query, 'MaxFragments=2, MinWords=5, MaxWords=20') AS snippet"
+            " FROM (SELECT * FROM (" + " UNION ALL ".join(selects) + ") hits"
+            " ORDER BY rank DESC, source, id LIMIT %s OFFSET %s) page, q"
+            " ORDER BY rank DESC, source, id"
+        )
+        return self.cached_query(query, (text, limit, offset))
+
+    def get_planit_page(self, listing: str, after: Optional[str] = None, limit: int = 100,
+                        fields: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None) -> tuple:
+        """
+        One keyset page of a PLANIT_LISTINGS listing, in the endpoint's sort order.
+
+        Filters (PLANIT_FILTERS), the page boundary and column selection all run in SQL.
+        Returns (rows, next_cursor), where next_cursor is None on the last page. Raises
+        ValueError for unknown fields or filters or a malformed cursor.
+        """
+        view, sort, allowed = PLANIT_LISTINGS[listing]
+        fields = list(dict.fromkeys(fields or allowed))
+        unknown = [f for f in fields if f not in allowed]
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(unknown)}")
+        conditions, params = [], []
+        for name, value in (filters or {}).items():
+            if name not in PLANIT_FILTERS:
+                raise ValueError(f"unknown filter: {name}")
+            if value in (None, '', []):
+                continue
+            column, op = PLANIT_FILTERS[name]
+            if op == 'in':
+                values = value if isinstance(value, list) else [value]
+                conditions.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+                params += values
+            else:
+                conditions.append(f"{column} {op} %s")
+                params.append(_iso_date(value))
+        keys = sort + ['id']
+        if after:
+            clause, keyset_params = _keyset_after(sort, _decode_cursor(after, len(keys)))
+            conditions.append(clause)
+            params += keyset_params
+        select = fields + [k for k in keys if k not in fields]
+        query = f"SELECT {', '.join(select)} FROM {view}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY " + ", ".join(f"{k} DESC NULLS LAST" for k in sort) + ", id DESC LIMIT %s"
+        rows = self.cached_query(query, tuple(params + [limit + 1]))
+        next_cursor = _encode_cursor([rows[limit - 1][k] for k in keys]) if len(rows) > limit else None
+        page = []
+        for row in rows[:limit]:
+            page.append({f: row[f] for f in fields})
+        return page, next_cursor
+
+    # PlanIt change history (see database/migrations/005_planit_history.sql)
+
+    def get_planit_renewables_as_of(self, at: str, uids: List[str] = None) -> List[Dict[str, Any]]:
+        """Rebuild planit_renewables rows as they were at timestamp `at` from their stored diffs (ValueError if malformed)"""
+        _iso_timestamp(at)
+        uid_filter = "AND uid = ANY(%s)" if uids else ""
+        params = (at, at, list(uids), at) if uids else (at, at, at)
+        query = (
+            "SELECT h.uid, jsonb_merge_agg(h.changes ORDER BY h.valid_from, h.id) AS row"
+            " FROM planit_renewables_history h"
+            " WHERE h.uid IN ("
+            "   SELECT uid FROM planit_renewables_history"
+            "   WHERE valid_from <= %s AND (valid_to IS NULL OR valid_to > %s) " + uid_filter +
+            " ) AND h.valid_from <= %s"
+            " GROUP BY h.uid ORDER BY h.uid"
+        )
+        return [{**r['row'], 'uid': r['uid']} for r in self.execute_query(query, params)]
+
+    def get_planit_renewables_changes(self, since: str, until: str, columns: List[str] = None,
+                                      uid: str = None) -> List[Dict[str, Any]]:
+        """
+        Versions recorded in (since, until], oldest first. Each has the uid, when it took
+        effect, op ('I' new row, 'U' update) and only the changed columns. `columns`
+        keeps versions touching any of them (e.g. ['app_state', 'decided_date']).
+        Raises ValueError for a malformed since/until.
+        """
+        conditions = ["valid_from > %s", "valid_from <= %s"]
+        params: List[Any] = [_iso_timestamp(since), _iso_timestamp(until)]
+        if columns:
+            conditions.append("changes ?| %s")
+            params.append(list(columns))
+        if uid:
+            conditions.append("uid = %s")
+            params.append(uid)
+        return self.execute_query(
+            "SELECT uid, valid_from, valid_to, op, changes FROM planit_renewables_history"
+            f" WHERE {' AND '.join(conditions)} ORDER BY valid_from, id",
+            tuple(params),
+        )
+
     # API Methods for each data source
 
 
     def get_west_lindsey_application(self) -> Dict[str, Any]:
         """Get West Lindsey planning application (latest one)"""
-        results = self.execute_query("SELECT * FROM west_lindsey_planning ORDER BY created_at DESC LIMIT 1")
+        results = self.cached_query(ENDPOINT_QUERIES['west_lindsey_application'])
         return results[0] if results else {}
 
     def get_west_lindsey_consultations(self) -> List[Dict[str, Any]]:
         """Get West Lindsey consultations with frontend-compatible field names"""
-        results = self.execute_query("SELECT * FROM west_lindsey_consultations ORDER BY original_created_time DESC NULLS LAST")
-
-        # Map database fields back to original CSV field names that frontend expects
-        for item in results:
-            item['consulteeName'] = item.get('consultee_name') or item.get('title', '')
-            item['opinion'] = item.get('status', '')
-            item['responseDetailsToPublish'] = item.get('description', '')
-            item['responsePublished'] = item.get('response_published', '0')
-            item['createdTime'] = item.get('original_created_time', '')
-            item['lastModifiedTime'] = item.get('original_last_modified_time', '')
-            item['consulteeEmail'] = item.get('consultee_email', '')
-            item['consulteeAddress'] = item.get('consultee_address', '')
-            item['id'] = item.get('consultation_id') or item.get('id')
-            item['applicationId'] = item.get('application_id', '')
-
-        return results
+        # Cached rows are shared, so map copies of them
+        results = self.cached_query(ENDPOINT_QUERIES['west_lindsey_consultations'])
+        return [consultation_frontend_fields(dict(item)) for item in results]
 
     def get_peeringdb_ix_gb(self) -> List[Dict[str, Any]]:
         """Get PeeringDB Internet Exchanges (GB)"""
-        return self.execute_query("SELECT * FROM peeringdb_ix_gb ORDER BY name")
+        return self.cached_query(ENDPOINT_QUERIES['peeringdb_ix_gb'])
 
     def get_peeringdb_fac_gb(self) -> List[Dict[str, Any]]:
         """Get PeeringDB Facilities (GB)"""
-        return self.execute_query("SELECT * FROM peeringdb_fac_gb ORDER BY name")
+        return self.cached_query(ENDPOINT_QUERIES['peeringdb_fac_gb'])
 
-    def get_planit_datacentres(self) -> List[Dict[str, Any]]:
-        """Get PlanIt data centres with field mapping for frontend compatibility"""
-        results = self.execute_query("SELECT * FROM planit_datacentres ORDER BY last_scraped DESC NULLS LAST")
+    def get_planit_datacentres(self, start_from: Optional[str] = None, start_to: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get PlanIt data centres (lat/lng/link columns come precomputed from the read model)"""
+        return self.cached_query(*self._start_date_bounded(ENDPOINT_QUERIES['planit_datacentres'], start_from, start_to))
 
-        # Map database fields to frontend expected fields
-        for item in results:
-            # Add frontend-compatible field names
-            item['lat'] = item.get('latitude')
-            item['lng'] = item.get('longitude')
-            item['link'] = item.get('url')
+    def get_planit_renewables(self, start_from: Optional[str] = None, start_to: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get PlanIt renewables (lat/lng/link columns come precomputed from the read model)"""
+        return self.cached_query(*self._start_date_bounded(ENDPOINT_QUERIES['planit_renewables'], start_from, start_to))
 
-        return results
-
-    def get_planit_renewables(self) -> List[Dict[str, Any]]:
-        """Get PlanIt renewables with field mapping for frontend compatibility"""
-        results = self.execute_query("SELECT * FROM planit_renewables ORDER BY last_scraped DESC NULLS LAST")
+    def export_rows(self, table: str, itersize: int = None) -> Tuple[List[str], Iterator[tuple]]:
+        """Column names and a lazy stream of every row of an EXPORT_TABLES table (plain tuples, id order)"""
+        columns, relation = EXPORT_TABLES[table]
+        query = f"SELECT {', '.join(columns)} FROM {relation} ORDER BY id"
+        return list(columns), self.execute_stream(query, itersize=itersize, as_dict=False)
 
-        # Map database fields to frontend expected fields
-        for item in results:
-            # Add frontend-compatible field names
-            item['lat'] = item.get('latitude')
-            item['lng'] = item.get('longitude')
-            item['link'] = item.get('url')
-
-        return results
+    def get_coordinates(self, table: str) -> Iterator[Dict[str, Any]]:
+        """Stream the key and coordinate columns of rows that have coordinates (for spatial joins)"""
+        if table == "peeringdb_fac_gb":
+            columns = "peeringdb_id, name, city, latitude, longitude"
+        else:
+            columns = "uid, name, area_name, app_state, latitude, longitude"
+        return self.execute_stream(
+            f"SELECT {columns} FROM {table} WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+        )
 
-    def get_planit_renewables_test2(self) -> List[Dict[str, Any]]:
+    def get_planit_renewables_test2(self, start_from: Optional[str] = None, start_to: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get PlanIt renewables test2 data with field mapping for frontend compatibility"""
-        # Show all renewables data ordered by most recent application date, then last scraped
-        results = self.execute_query("SELECT * FROM planit_renewables ORDER BY start_date DESC NULLS LAST, last_scraped DESC NULLS LAST")
-
-        # Map database fields to frontend expected fields
-        for item in results:
-            # Add frontend-compatible field names
-            item['lat'] = item.get('latitude')
-            item['lng'] = item.get('longitude')
-            item['link'] = item.get('url')
-
-            # Fix missing names - use uid as fallback if name is empty
-            if not item.get('name'):
-                item['name'] = item.get('uid', '')
-
-            # Fix missing area_name - extract from uid if missing
-            if not item.get('area_name') and item.get('uid'):
-                # Extract authority from uid (e.g., "EastRiding/25/02255/STPLFE" -> "EastRiding")
-                uid_parts = item.get('uid', '').split('/')
-                if len(uid_parts) > 0:
-                    item['area_name'] = uid_parts[0]
-
-        return results
+        # Show all renewables data ordered by most recent application date, then last scraped.
+        # The read model supplies lat/lng/link and the uid-derived name/area_name fallbacks.
+        return self.cached_query(*self._start_date_bounded(ENDPOINT_QUERIES['planit_renewables_test2'], start_from, start_to))
 
-# Global database instance
-db = SupabaseDB()
\ No newline at end of file
+# Global database instance (DB_BACKEND=sqlite selects the embedded backend)
+if os.getenv('DB_BACKEND', 'supabase').lower() == 'sqlite':
+    if __package__:
+        from .database_sqlite import SQLiteDB
+    else:
+        from database_sqlite import SQLiteDB
+    db = SQLiteDB()
+else:
+    db = SupabaseDB()
\ No newline at end of file
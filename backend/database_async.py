@@ -0,0 +1,179 @@
+"""
+asyncio database layer (asyncpg) mirroring the read methods of SupabaseDB.
+
+The Flask views stay synchronous: with USE_ASYNC_DB=1 they call this layer through
+BlockingAsyncDB, which shares one asyncpg pool (and its prepared statements) between
+all worker threads. No endpoint is an async view.
+"""
+import asyncio
+import concurrent.futures
+import json
+import os
+import re
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+from dotenv import load_dotenv
+
+from database import ENDPOINT_QUERIES, QueryCache, SupabaseDB, consultation_frontend_fields, tables_read
+
+load_dotenv()
+
+_PLACEHOLDER = re.compile(r"%s")
+
+
+def to_asyncpg_query(query: str) -> str:
+    """Rewrite psycopg2 %s placeholders as asyncpg's $1, $2, ..."""
+    counter = iter(range(1, 10_000))
+    return _PLACEHOLDER.sub(lambda _: f"${next(counter)}", query)
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    # Decode json/jsonb to Python objects, as psycopg2 does, so both layers return the same rows
+    for typename in ("json", "jsonb"):
+        await conn.set_type_codec(typename, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+class AsyncSupabaseDB:
+    """
+    Async counterpart of SupabaseDB's get_* methods over an asyncpg pool.
+
+    asyncpg prepares every statement and caches it per connection, so the fixed
+    ENDPOINT_QUERIES are parsed and planned once per pooled connection. Set
+    ASYNC_DB_STATEMENT_CACHE=0 when connecting through a transaction-mode pooler
+    (e.g. Supabase's pgbouncer port), which can't hold prepared statements.
+
+    Reads go through `query_cache`; pass the SupabaseDB's cache so that its write
+    and refresh invalidations cover these results too.
+    """
+
+    def __init__(self, database_url: Optional[str] = None, query_cache: Optional[QueryCache] = None):
+        self.database_url = database_url or os.getenv('DATABASE_URL')
+        self.query_cache = query_cache or QueryCache.from_env()
+        self.pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+
+    async def get_pool(self) -> asyncpg.Pool:
+        async with self._pool_lock:
+            if self.pool is None:
+                self.pool = await asyncpg.create_pool(
+                    self.database_url,
+                    min_size=int(os.getenv('DB_POOL_MIN', '1')),
+                    max_size=int(os.getenv('DB_POOL_MAX', '10')),
+                    max_inactive_connection_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+                    statement_cache_size=int(os.getenv('ASYNC_DB_STATEMENT_CACHE', '100')),
+                    init=_init_connection,
+                )
+        return self.pool
+
+    async def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """Execute a SELECT query and return the rows as dicts"""
+        try:
+            pool = await self.get_pool()
+            async with pool.acquire(timeout=float(os.getenv('DB_POOL_TIMEOUT', '10'))) as conn:
+                records = await conn.fetch(to_asyncpg_query(query), *(params or ()))
+            return [dict(record) for record in records]
+        except Exception as e:
+            print(f"Async query failed: {e}")
+            return []
+
+    async def cached_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """execute_query through the result cache; failed (empty) reads are not cached"""
+        if not self.query_cache.enabled:
+            return await self.execute_query(query, params)
+        key = (query, params)
+        results = self.query_cache.get(key)
+        if results is None:
+            results = await self.execute_query(query, params)
+            if results:
+                self.query_cache.put(key, tables_read(query), results)
+        return results
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def _planit_query(self, key: str, start_from: Optional[str], start_to: Optional[str]) -> List[Dict[str, Any]]:
+        """Raises ValueError for a malformed start_from/start_to date"""
+        query, params = SupabaseDB._start_date_bounded(ENDPOINT_QUERIES[key], start_from, start_to)
+        # asyncpg binds parameters by type, so date bounds must be real dates
+        params = tuple(date.fromisoformat(p) for p in params) if params else None
+        return await self.cached_query(query, params)
+
+    # API Methods for each data source (same results as SupabaseDB)
+
+    async def get_west_lindsey_application(self) -> Dict[str, Any]:
+        results = await self.cached_query(ENDPOINT_QUERIES['west_lindsey_application'])
+        return results[0] if results else {}
+
+    async def get_west_lindsey_consultations(self) -> List[Dict[str, Any]]:
+        # Cached rows are shared, so map copies of them
+        results = await self.cached_query(ENDPOINT_QUERIES['west_lindsey_consultations'])
+        return [consultation_frontend_fields(dict(item)) for item in results]
+
+    async def get_peeringdb_ix_gb(self) -> List[Dict[str, Any]]:
+        return await self.cached_query(ENDPOINT_QUERIES['peeringdb_ix_gb'])
+
+    async def get_peeringdb_fac_gb(self) -> List[Dict[str, Any]]:
+        return await self.cached_query(ENDPOINT_QUERIES['peeringdb_fac_gb'])
+
+    async def get_planit_datacentres(self, start_from: Optional[str] = None, start_to: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self._planit_query('planit_datacentres', start_from, start_to)
+
+    async def get_planit_renewables(self, start_from: Optional[str] = None, start_to: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self._planit_query('planit_renewables', start_from, start_to)
+
+    async def get_planit_renewables_test2(self, start_from: Optional[str] = None, start_to: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self._planit_query('planit_renewables_test2', start_from, start_to)
+
+
+class BlockingAsyncDB:
+    """
+    Run AsyncSupabaseDB on one background event loop for synchronous (WSGI) callers.
+
+    Every Flask worker thread submits its query to the same loop, so all requests share
+    a single asyncpg pool and its prepared statements instead of a connection per thread.
+    Method calls look like SupabaseDB's: db.get_planit_renewables() returns the rows, and
+    exceptions (e.g. ValueError for bad input) are raised in the calling thread. A call
+    still running after `timeout` seconds (ASYNC_DB_TIMEOUT) is cancelled and raises
+    TimeoutError, so a stuck loop can't hold a worker thread forever.
+    """
+
+    def __init__(self, async_db: AsyncSupabaseDB, timeout: Optional[float] = None):
+        self.async_db = async_db
+        self.timeout = timeout if timeout is not None else float(os.getenv('ASYNC_DB_TIMEOUT', '30'))
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="async-db", daemon=True)
+        self._thread.start()
+
+    def run(self, coro, timeout: Optional[float] = None):
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def __getattr__(self, name: str):
+        method = getattr(self.async_db, name)
+        if not asyncio.iscoroutinefunction(method):
+            return method
+        return lambda *args, **kwargs: self.run(method(*args, **kwargs))
+
+    def close(self) -> None:
+        self.run(self.async_db.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_blocking_db: Optional[BlockingAsyncDB] = None
+
+
+def get_blocking_async_db(query_cache: Optional[QueryCache] = None) -> BlockingAsyncDB:
+    """Process-wide async DB bridge, started on first use (query_cache: share the sync layer's cache)"""
+    global _blocking_db
+    if _blocking_db is None:
+        _blocking_db = BlockingAsyncDB(AsyncSupabaseDB(query_cache=query_cache))
+    return _blocking_db
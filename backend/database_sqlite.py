@@ -0,0 +1,323 @@
+"""
+Embedded SQLite backend implementing the SupabaseDB interface (DB_BACKEND=sqlite)
+"""
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+if __package__:
+    from .database import QueryCache, SupabaseDB, _iso_timestamp
+else:
+    from database import QueryCache, SupabaseDB, _iso_timestamp
+
+DEFAULT_SQLITE_PATH = Path(__file__).parent.parent / "local.sqlite"
+SCHEMA_PATH = Path(__file__).parent.parent / "database" / "schema_sqlite.sql"
+# Keep IN (...) lists under SQLite's bound-parameter limit
+_MAX_PARAMS = 500
+
+# LIKE-based stand-in for the Postgres full-text SEARCH_SOURCES: (table, key, title, area, date, searchable text)
+_SEARCH_SOURCES = {
+    'renewables': ("planit_renewables", "uid", "COALESCE(NULLIF(name, ''), uid)", "area_name", "start_date",
+                   "COALESCE(name, '') || ' ' || COALESCE(description, '') || ' ' || COALESCE(address, '') || ' ' || COALESCE(postcode, '')"),
+    'datacentres': ("planit_datacentres", "uid", "COALESCE(NULLIF(name, ''), uid)", "area_name", "start_date",
+                    "COALESCE(name, '') || ' ' || COALESCE(description, '') || ' ' || COALESCE(address, '') || ' ' || COALESCE(postcode, '')"),
+    'consultations': ("west_lindsey_consultations", "consultation_id", "COALESCE(NULLIF(consultee_name, ''), title)", "NULL",
+                      "substr(original_created_time, 1, 10)",
+                      "COALESCE(consultee_name, '') || ' ' || COALESCE(title, '') || ' ' || COALESCE(description, '') || ' ' || COALESCE(consultee_address, '')"),
+}
+
+
+# execute_values: "(VALUES %s) AS v(a, b)" (SQLite can't name VALUES columns) and Postgres casts
+_ALIASED_VALUES = re.compile(r"\(\s*VALUES\s+%s\s*\)\s*AS\s+(\w+)\s*\(([^)]*)\)", re.IGNORECASE)
+_CAST = re.compile(r"::\s*[a-z_][a-z0-9_ ]*(?:\[\])?", re.IGNORECASE)
+
+
+def _to_sqlite_query(query: str) -> str:
+    """Rewrite psycopg2 %s placeholders as SQLite's ?"""
+    return query.replace("%s", "?")
+
+
+def _sqlite_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+class SQLiteDB(SupabaseDB):
+    """
+    SupabaseDB backed by a local SQLite file, for offline runs, tests and single-node deployments.
+
+    Uses the same table and read-model names as Postgres (database/schema_sqlite.sql), so
+    ENDPOINT_QUERIES and the get_* methods run unchanged. Each thread gets its own
+    connection; WAL mode lets the API read while a scraper writes. Postgres-only features
+    (partitions, full-text ranking, change history) degrade to no-ops or simple fallbacks.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.getenv('SQLITE_DB_PATH') or DEFAULT_SQLITE_PATH)
+        self.supabase_url = None
+        self.supabase_key = None
+        self.database_url = None
+        self.supabase = None
+        self.pool = None
+        self._partitioned: Dict[str, bool] = {}
+        self.query_cache = QueryCache.from_env()
+        self._stream_ids = itertools.count(1)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_connection(self):
+        return self._conn()
+
+    @contextmanager
+    def connection(self):
+        """This thread's connection; commit on success, roll back on error"""
+        conn = self._conn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def pool_metrics(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "path": str(self.path)}
+
+    def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """Execute a SELECT query and return results as list of dicts"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute(_to_sqlite_query(query), [_sqlite_value(p) for p in params or ()])
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Query failed: {e}")
+            return []
+
+    def execute_stream(self, query: str, params: tuple = None, itersize: int = None,
+                       as_dict: bool = True) -> Iterator[Union[Dict[str, Any], tuple]]:
+        """Lazily yield the rows of a SELECT, fetching `itersize` at a time (errors are re-raised)"""
+        itersize = itersize or int(os.getenv('DB_STREAM_ITERSIZE', '2000'))
+        try:
+            cursor = self._conn().execute(_to_sqlite_query(query), [_sqlite_value(p) for p in params or ()])
+            while True:
+                rows = cursor.fetchmany(itersize)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row) if as_dict else tuple(row)
+        except Exception as e:
+            print(f"Streaming query failed: {e}")
+            raise
+
+    def execute_raw(self, query: str, params: tuple = None) -> bool:
+        """Execute a raw SQL statement (or, without params, a script of statements)"""
+        try:
+            with self.connection() as conn:
+                if params is None:
+                    conn.executescript(query)
+                else:
+                    conn.execute(_to_sqlite_query(query), [_sqlite_value(p) for p in params])
+            self._invalidate_written(query)
+            return True
+        except Exception as e:
+            print(f"Raw query failed: {e}")
+            return False
+
+    def execute_values(self, query: str, rows: List[tuple], template: str = None, page_size: int = 1000) -> int:
+        """
+        Execute a bulk statement with a VALUES %s placeholder, returning rows affected.
+
+        Each page's rows are expanded into the placeholder (casts in template dropped);
+        an aliased (VALUES %s) AS v(a, b) becomes a UNION ALL subquery naming the columns.
+        """
+        if not rows:
+            return 0
+        aliased = _ALIASED_VALUES.search(query)
+        row_sql = _CAST.sub("", template or "(" + ", ".join(["%s"] * len(rows[0])) + ")").replace("%s", "?")
+        try:
+            affected = 0
+            with self.connection() as conn:
+                for i in range(0, len(rows), page_size):
+                    page = rows[i:i + page_size]
+                    if aliased:
+                        alias, columns = aliased.group(1), [c.strip() for c in aliased.group(2).split(",")]
+                        selects = ["SELECT " + ", ".join(f"? AS {c}" for c in columns)]
+                        selects += ["SELECT " + ", ".join(["?"] * len(columns))] * (len(page) - 1)
+                        values = f"({' UNION ALL '.join(selects)}) AS {alias}"
+                        statement = query[:aliased.start()] + values + query[aliased.end():]
+                    else:
+                        statement = query.replace("VALUES %s", "VALUES " + ", ".join([row_sql] * len(page)), 1)
+                    cursor = conn.execute(statement, [_sqlite_value(v) for row in page for v in row])
+                    affected += cursor.rowcount
+            self._invalidate_written(query)
+            return affected
+        except Exception as e:
+            print(f"Bulk query failed: {e}")
+            return 0
+
+    def update_coordinates(self, table: str, values: List[tuple]) -> int:
+        try:
+            with self.connection() as conn:
+                cursor = conn.executemany(
+                    f'UPDATE "{table}" SET latitude = ?, longitude = ? WHERE id = ?',
+                    [(lat, lng, row_id) for row_id, lat, lng in values],
+                )
+                updated = cursor.rowcount
+            self.invalidate(table)
+            return updated
+        except Exception as e:
+            print(f"Coordinate update on {table} failed: {e}")
+            return 0
+
+    def _primary_key(self, table: str) -> List[str]:
+        info = self._conn().execute(f'PRAGMA table_info("{table}")').fetchall()
+        return [row["name"] for row in sorted(info, key=lambda r: r["pk"]) if row["pk"]]
+
+    def _upsert(self, table: str, data: List[Dict[str, Any]], conflict_columns: Optional[List[str]]) -> Dict[str, int]:
+        columns: List[str] = []
+        for row in data:
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+        col_list = ", ".join(f'"{c}"' for c in columns)
+        placeholders = ", ".join("?" * len(columns))
+        statement = f'INSERT INTO "{table}" ({col_list}) VALUES ({placeholders})'
+        update_columns = [c for c in columns if c not in (conflict_columns or [])]
+        if conflict_columns:
+            conflict = ", ".join(f'"{c}"' for c in conflict_columns)
+            if update_columns:
+                statement += f" ON CONFLICT ({conflict}) DO UPDATE SET " + ", ".join(
+                    f'"{c}" = excluded."{c}"' for c in update_columns
+                )
+            else:
+                statement += f" ON CONFLICT ({conflict}) DO NOTHING"
+        with self.connection() as conn:
+            before = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            conn.executemany(statement, [[_sqlite_value(row.get(c)) for c in columns] for row in data])
+            after = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        inserted = after - before
+        if conflict_columns:
+            distinct = len({tuple(row.get(c) for c in conflict_columns) for row in data})
+        else:
+            distinct = len(data)
+        return {"inserted": inserted, "updated": max(distinct - inserted, 0)}
+
+    def execute_insert(self, table: str, data: Dict[str, Any]) -> bool:
+        """Insert data into table"""
+        try:
+            self._upsert(table, [data], None)
+            self.invalidate(table)
+            return True
+        except Exception as e:
+            print(f"Insert failed: {e}")
+            return False
+
+    def execute_upsert(self, table: str, data: List[Dict[str, Any]], conflict_columns: List[str] = None) -> bool:
+        """Upsert data into table (insert or update on conflict)"""
+        if not data:
+            return False
+        try:
+            # Like a PostgREST upsert without on_conflict, match rows on the primary key
+            self._upsert(table, data, conflict_columns or self._primary_key(table))
+            self.invalidate(table)
+            return True
+        except Exception as e:
+            print(f"Upsert failed: {e}")
+            return False
+
+    def bulk_upsert(self, table: str, data: List[Dict[str, Any]], conflict_columns: List[str] = None) -> Optional[Dict[str, int]]:
+        """Upsert in one transaction, returning {"inserted": n, "updated": m}, or None on failure"""
+        if not data:
+            return {"inserted": 0, "updated": 0}
+        try:
+            counts = self._upsert(table, data, conflict_columns or ['uid'])
+            self.invalidate(table)
+            return counts
+        except Exception as e:
+            print(f"Bulk upsert into {table} failed: {e}")
+            return None
+
+    def select_by_keys(self, table: str, columns: List[str], key_columns: List[str], keys: List[Any]) -> List[Dict[str, Any]]:
+        """Fetch `columns` for rows whose value in any of `key_columns` is among `keys` (raises on failure)"""
+        keys = list(dict.fromkeys(k for k in keys if k not in (None, '')))
+        step = max(1, _MAX_PARAMS // max(1, len(key_columns)))
+        results: Dict[Any, Dict[str, Any]] = {}
+        for i in range(0, len(keys), step):
+            chunk = keys[i:i + step]
+            marks = ", ".join("?" * len(chunk))
+            where = " OR ".join(f'"{c}" IN ({marks})' for c in key_columns)
+            select = ", ".join(f'"{c}"' for c in columns)
+            query = f'SELECT rowid AS _rowid, {select} FROM "{table}" WHERE {where}'
+            for row in self.execute_stream(query, tuple(chunk * len(key_columns))):
+                results[row.pop('_rowid')] = row
+        return list(results.values())
+
+    def unknown_keys(self, table: str, column: str, keys: List[Any], key_type: str = 'text') -> List[Any]:
+        """Return the candidate keys that are not yet present in table.column (raises on failure)"""
+        keys = list(dict.fromkeys(k for k in keys if k not in (None, '')))
+        known = set()
+        for row in self.select_by_keys(table, [column], [column], keys):
+            known.add(row[column])
+        return [k for k in keys if k not in known]
+
+    def count_rows(self, table: str) -> int:
+        result = self.execute_query(f'SELECT COUNT(*) AS count FROM "{table}"')
+        return result[0]['count'] if result else 0
+
+    def is_partitioned(self, table: str) -> bool:
+        return False
+
+    def refresh_read_models(self, table: str) -> bool:
+        # Read models are plain views in SQLite, always current
+        self.invalidate(table)
+        return True
+
+    def search(self, text: str, sources: List[str] = None, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """Substring search: every word must appear; newest first (no relevance ranking)"""
+        terms = [t for t in text.split() if t]
+        selects, params = [], []
+        for source in sources or _SEARCH_SOURCES:
+            if source not in _SEARCH_SOURCES:
+                continue
+            table, key, title, area, date, body = _SEARCH_SOURCES[source]
+            where = " AND ".join(f"({body}) LIKE ?" for _ in terms)
+            selects.append(
+                f"SELECT '{source}' AS source, id, CAST({key} AS TEXT) AS key, {title} AS title, {area} AS area,"
+                f" {date} AS date, url, 0.0 AS rank, substr(COALESCE(description, ''), 1, 200) AS snippet"
+                f" FROM {table} WHERE {where}"
+            )
+            params += [f"%{t}%" for t in terms]
+        if not terms or not selects:
+            return []
+        query = " UNION ALL ".join(selects) + " ORDER BY date DESC, source, id LIMIT ? OFFSET ?"
+        return self.cached_query(query, tuple(params) + (limit, offset))
+
+    def get_planit_renewables_as_of(self, at: str, uids: List[str] = None) -> List[Dict[str, Any]]:
+        _iso_timestamp(at)
+        print("Change history is only recorded by the Postgres backend")
+        return []
+
+    def get_planit_renewables_changes(self, since: str, until: str, columns: List[str] = None,
+                                      uid: str = None) -> List[Dict[str, Any]]:
+        _iso_timestamp(since), _iso_timestamp(until)
+        print("Change history is only recorded by the Postgres backend")
+        return []
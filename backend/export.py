@@ -0,0 +1,56 @@
+"""
+Chunked NDJSON / CSV encoders for streaming whole-table exports
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, List, Sequence
+
+from response_format import dumps
+
+# Bytes gathered before a chunk is handed to the WSGI server
+CHUNK_BYTES = 64 * 1024
+
+EXPORT_FORMATS = {
+    'ndjson': ("application/x-ndjson", "ndjson"),
+    'csv': ("text/csv", "csv"),
+}
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def ndjson_chunks(columns: Sequence[str], rows: Iterable[tuple], chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """One JSON object per line, yielded roughly chunk_bytes at a time"""
+    buffer: List[bytes] = []
+    size = 0
+    for row in rows:
+        line = dumps(dict(zip(columns, row))) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def csv_chunks(columns: Sequence[str], rows: Iterable[tuple], chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """Header line plus one CSV record per row (dates ISO 8601, JSON columns as JSON text)"""
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_cell(v) for v in row])
+        if text.tell() >= chunk_bytes:
+            yield text.getvalue().encode("utf-8")
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode("utf-8")
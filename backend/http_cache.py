@@ -0,0 +1,128 @@
+"""
+Conditional GET support and serialized-response caching shared by both API servers
+"""
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from flask import Response, current_app, request
+
+# (version token, last modified) for a set of data sources
+VersionFn = Callable[[Tuple[str, ...]], Tuple[str, Optional[datetime]]]
+
+# Response headers worth replaying from a cached body
+_KEPT_HEADERS = ("X-Next-Cursor",)
+
+
+class _Entry(NamedTuple):
+    etag: str
+    body: bytes
+    mimetype: str
+    headers: Dict[str, str]
+    sources: Tuple[str, ...]
+
+
+class ResponseCache:
+    """
+    ETag / 304 handling plus an LRU cache of serialized GET response bodies.
+
+    Each cached route names the data sources it reads (tables, CSV files). `version_fn`
+    maps those sources to a version token that changes whenever the data does; the ETag
+    is derived from the route, its query string and that token. A request whose
+    If-None-Match matches gets an empty 304 without running the view, and a repeat
+    request for unchanged data is answered from the stored bytes without re-serializing.
+    """
+
+    def __init__(self, version_fn: VersionFn, max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024):
+        self.version_fn = version_fn
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def cached(self, *sources: str):
+        """Decorator for a GET view reading `sources`; apply beneath @app.route"""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                token, last_modified = self.version_fn(sources)
+                key = (request.path, request.query_string)
+                etag = hashlib.sha1(repr((key, token)).encode("utf-8")).hexdigest()
+
+                # Weak comparison, as the Compressor weakens ETags of encoded bodies
+                if request.if_none_match.contains_weak(etag):
+                    with self._lock:
+                        self.not_modified += 1
+                    return self._finish(Response(status=304), etag, last_modified)
+
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None and entry.etag == etag:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                    else:
+                        entry = None
+                        self.misses += 1
+                if entry is None:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough:
+                        return response
+                    entry = _Entry(
+                        etag,
+                        response.get_data(),
+                        response.mimetype,
+                        {h: response.headers[h] for h in _KEPT_HEADERS if h in response.headers},
+                        sources,
+                    )
+                    self._store(key, entry)
+
+                response = Response(entry.body, mimetype=entry.mimetype, headers=entry.headers)
+                return self._finish(response, etag, last_modified).make_conditional(request)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _finish(response: Response, etag: str, last_modified: Optional[datetime]) -> Response:
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        # Let browsers keep the body but revalidate (cheaply, via 304) on every load
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def _store(self, key: tuple, entry: _Entry) -> None:
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def invalidate(self, sources: Optional[Iterable[str]] = None) -> None:
+        """Drop cached bodies reading any of sources, or everything when sources is None"""
+        wanted = set(sources) if sources is not None else None
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if wanted is None or wanted & set(e.sources)]:
+                self._bytes -= len(self._entries.pop(key).body)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
@@ -0,0 +1,232 @@
+"""
+Background refresh jobs: scraper subprocesses with IDs, progress events and per-source timeouts
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# The prefix report_progress() prints; scraper/io.py only needs the stdlib, so it's safe to import here
+from scraper.io import PROGRESS_PREFIX
+
+FINISHED = ("succeeded", "failed", "timed_out")
+
+
+class RefreshSource(NamedTuple):
+    module: str
+    table: str
+    timeout: float  # seconds; REFRESH_TIMEOUT_<SOURCE> overrides, e.g. REFRESH_TIMEOUT_PLANIT_RENEW=1800
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() if ts else None
+
+
+class Job:
+    """One scraper run. State changes bump `seq` and wake anyone waiting on `changed`."""
+
+    def __init__(self, source: str, spec: RefreshSource, timeout: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.module = spec.module
+        self.table = spec.table
+        self.timeout = timeout
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.returncode: Optional[int] = None
+        self.timed_out = False
+        self.progress: Dict[str, Any] = {}
+        self.message = ""
+        self.log: deque = deque(maxlen=200)
+        self.result: Optional[Dict[str, Any]] = None
+        self.seq = 0
+        self.changed = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def update(self, **fields: Any) -> None:
+        with self.changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.seq += 1
+            self.changed.notify_all()
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self, log_lines: int = 0) -> Dict[str, Any]:
+        state = {
+            "id": self.id,
+            "source": self.source,
+            "table": self.table,
+            "status": self.status,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+            "elapsed_s": f"{self.elapsed():.2f}",
+            "timeout_s": self.timeout,
+            "progress": dict(self.progress),
+            "message": self.message,
+            "result": self.result,
+        }
+        if log_lines:
+            state["log"] = list(self.log)[-log_lines:]
+        return state
+
+
+class JobManager:
+    """
+    Runs refresh scrapers in the background, one subprocess per job.
+
+    submit() returns at once with a Job; a second request for a source whose job is
+    still queued or running gets that same job back (coalesced) instead of starting
+    another scrape. At most `max_running` scrapers run together, each killed after its
+    source's timeout. Lines the scraper prints with PROGRESS_PREFIX update job.progress;
+    everything else goes to the job's log. `on_success(job)` runs in the job thread
+    after a clean exit (e.g. to drop caches) and may add fields to the job's result.
+    """
+
+    def __init__(self, sources: Dict[str, RefreshSource], cwd: str,
+                 on_success: Optional[Callable[[Job], Optional[Dict[str, Any]]]] = None,
+                 max_running: int = 2, keep: int = 100):
+        self.sources = sources
+        self.cwd = cwd
+        self.on_success = on_success
+        self.keep = keep
+        self._slots = threading.Semaphore(max_running)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, sources: Dict[str, RefreshSource], cwd: str, on_success=None) -> "JobManager":
+        return cls(sources, cwd, on_success, max_running=int(os.getenv('REFRESH_MAX_RUNNING', '2')))
+
+    def timeout_for(self, source: str) -> float:
+        env = "REFRESH_TIMEOUT_" + source.upper().replace("-", "_")
+        return float(os.getenv(env, self.sources[source].timeout))
+
+    def submit(self, source: str) -> Tuple[Job, bool]:
+        """Start (or join) the refresh of source; returns (job, coalesced)"""
+        with self._lock:
+            active = self._active.get(source)
+            if active is not None and not active.done:
+                return active, True
+            job = Job(source, self.sources[source], self.timeout_for(source))
+            self._jobs[job.id] = job
+            self._active[source] = job
+            finished = [j for j in self._jobs.values() if j.done]
+            for old in finished[:max(0, len(finished) - self.keep)]:
+                del self._jobs[old.id]
+        threading.Thread(target=self._run, args=(job,), name=f"refresh-{source}", daemon=True).start()
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _consume(self, job: Job, line: str) -> None:
+        if line.startswith(PROGRESS_PREFIX):
+            try:
+                counts = json.loads(line[len(PROGRESS_PREFIX):])
+            except ValueError:
+                counts = {}
+            job.update(progress={**job.progress, **counts})
+        elif line.strip():
+            job.log.append(line)
+            job.update(message=line)
+
+    def _kill(self, job: Job, proc: subprocess.Popen) -> None:
+        # The timer can fire just as the scraper exits; a run that finished in time isn't a timeout
+        if proc.poll() is not None:
+            return
+        print(f"[Jobs] Refresh {job.source} ({job.id}) timed out after {job.timeout:.0f}s, killing it", flush=True)
+        job.timed_out = True
+        proc.kill()
+
+    def _run(self, job: Job) -> None:
+        with self._slots:
+            job.update(status="running", started_at=time.time())
+            print(f"[Jobs] Starting {job.module} as job {job.id} (timeout {job.timeout:.0f}s)", flush=True)
+            try:
+                proc = subprocess.Popen(
+                    [sys.executable, "-u", "-m", job.module],
+                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=self.cwd,
+                    text=True, encoding="utf-8", errors="replace", bufsize=1,
+                )
+            except OSError as e:
+                self._finish(job, "failed", None, f"could not start scraper: {e}")
+                return
+            timer = threading.Timer(job.timeout, self._kill, args=(job, proc))
+            timer.daemon = True
+            timer.start()
+            try:
+                for line in proc.stdout:
+                    self._consume(job, line.rstrip("\n"))
+                proc.wait()
+            finally:
+                timer.cancel()
+                proc.stdout.close()
+
+            if job.timed_out:
+                self._finish(job, "timed_out", proc.returncode, "timeout")
+            elif proc.returncode != 0:
+                self._finish(job, "failed", proc.returncode, "runner_failed")
+            else:
+                self._finish(job, "succeeded", 0, None)
+
+    def _finish(self, job: Job, status: str, returncode: Optional[int], error: Optional[str]) -> None:
+        finished_at = time.time()
+        result: Dict[str, Any] = {
+            "ok": error is None,
+            "job_id": job.id,
+            "table": job.table,
+            "elapsed_s": f"{finished_at - (job.started_at or finished_at):.2f}",
+        }
+        if error is None and self.on_success is not None:
+            try:
+                result.update(self.on_success(job) or {})
+            except Exception as e:
+                print(f"[Jobs] Post-refresh step for {job.source} failed: {e}", flush=True)
+        if error is not None:
+            result["error"] = error
+            result["log"] = "\n".join(job.log)[-2000:]
+        print(f"[Jobs] Job {job.id} ({job.source}) {status} in {result['elapsed_s']}s", flush=True)
+        with self._lock:
+            if self._active.get(job.source) is job:
+                del self._active[job.source]
+        job.update(status=status, returncode=returncode, finished_at=finished_at, result=result)
+
+    def events(self, job: Job, heartbeat: float = 15.0) -> Iterator[str]:
+        """Server-sent events: `progress` on every change, then one `done` carrying the result"""
+        seen = None
+        while True:
+            with job.changed:
+                if job.seq == seen:
+                    job.changed.wait(heartbeat)
+                state = None
+                if job.seq != seen:
+                    seen, state = job.seq, job.to_dict()
+            if state is None:
+                yield ": keep-alive\n\n"
+                continue
+            event = "done" if state["status"] in FINISHED else "progress"
+            yield f"event: {event}\ndata: {json.dumps(state)}\n\n"
+            if event == "done":
+                return
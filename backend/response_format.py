@@ -0,0 +1,177 @@
+"""
+Negotiated response compression and the compact columnar JSON shape shared by both API servers
+"""
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from flask import Flask, Response, jsonify, request
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder produces the same JSON, only slower
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+# Low-cardinality PlanIt columns sent as indexes into a per-response dictionary
+DICTIONARY_FIELDS = ("area_name", "app_state", "app_type")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize with orjson when installed; dates become ISO 8601 either way"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def columnar(rows: Sequence[Dict[str, Any]], dictionary_fields: Iterable[str] = DICTIONARY_FIELDS) -> Dict[str, Any]:
+    """
+    Rows as {"columns": [...], "data": [[...], ...], "dictionaries": {column: [values]}}.
+
+    Each row becomes a list in `columns` order. Values of the dictionary-encoded columns
+    are replaced by their index into dictionaries[column] (nulls stay null), so a long
+    authority name is sent once rather than once per application.
+    """
+    columns: List[str] = []
+    for row in rows[:1]:
+        columns = list(row)
+    for row in rows:
+        if len(row) != len(columns):
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+    encoded = [c for c in dictionary_fields if c in columns]
+    dictionaries: Dict[str, List[Any]] = {c: [] for c in encoded}
+    indexes: Dict[str, Dict[Any, int]] = {c: {} for c in encoded}
+    positions = [(columns.index(c), indexes[c], dictionaries[c]) for c in encoded]
+
+    data = []
+    for row in rows:
+        values = [row.get(c) for c in columns]
+        for position, index, values_seen in positions:
+            value = values[position]
+            if value is not None:
+                code = index.get(value)
+                if code is None:
+                    code = index[value] = len(values_seen)
+                    values_seen.append(value)
+                values[position] = code
+        data.append(values)
+    return {"columns": columns, "data": data, "dictionaries": dictionaries}
+
+
+def listing_response(rows: Sequence[Dict[str, Any]]) -> Response:
+    """jsonify(rows), or the columnar shape when the client asked for ?format=columns"""
+    if request.args.get("format") == "columns":
+        return Response(dumps(columnar(rows)), mimetype="application/json")
+    return jsonify(rows)
+
+
+class Compressor:
+    """
+    gzip / brotli for JSON responses, negotiated from Accept-Encoding.
+
+    Runs as an after_request hook, so it covers every view (and the bodies replayed by
+    ResponseCache). Responses that are small, streamed, file-backed or already encoded
+    pass through. When a response carries an ETag the compressed bytes are kept in a
+    small LRU keyed by (ETag, encoding), so a cache hit isn't recompressed; the ETag is
+    marked weak, as the same entity is now sent in more than one encoding.
+    """
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5, max_entries: int = 64):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.reused = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @classmethod
+    def from_env(cls) -> "Compressor":
+        return cls(
+            min_size=int(os.getenv('COMPRESS_MIN_SIZE', '1024')),
+            gzip_level=int(os.getenv('COMPRESS_GZIP_LEVEL', '6')),
+            brotli_quality=int(os.getenv('COMPRESS_BROTLI_QUALITY', '5')),
+        )
+
+    def init_app(self, app: Flask) -> None:
+        app.after_request(self.compress)
+
+    def _encoding(self) -> Optional[str]:
+        accept = request.accept_encodings
+        if brotli is not None and accept.quality("br") > 0:
+            return "br"
+        if accept.quality("gzip") > 0:
+            return "gzip"
+        return None
+
+    def compress(self, response: Response) -> Response:
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or response.mimetype != "application/json" or "Content-Encoding" in response.headers):
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = self._encoding()
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        key = (etag, encoding) if etag else None
+        with self._lock:
+            compressed = self._entries.get(key) if key else None
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.reused += 1
+        if compressed is None:
+            if encoding == "br":
+                compressed = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                compressed = gzip.compress(body, compresslevel=self.gzip_level)
+            with self._lock:
+                self.compressed += 1
+                if key:
+                    self._entries[key] = compressed
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+
+        with self._lock:
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "encodings": ["br", "gzip"] if brotli is not None else ["gzip"],
+                "compressed": self.compressed,
+                "reused": self.reused,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            }
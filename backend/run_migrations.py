@@ -0,0 +1,50 @@
+"""
+Apply SQL migrations from database/migrations in filename order, once each (PostgreSQL only).
+Each file runs in its own transaction, and the migrations are safe to re-run.
+"""
+import sys
+from pathlib import Path
+
+from database import db
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "database" / "migrations"
+
+
+def applied_migrations() -> set:
+    db.execute_raw(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " filename TEXT PRIMARY KEY,"
+        " applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()"
+        ")"
+    )
+    return {row['filename'] for row in db.execute_query("SELECT filename FROM schema_migrations")}
+
+
+def apply_migration(path: Path) -> bool:
+    """Run one migration and record it in the same transaction: it either fully applies or leaves no trace"""
+    try:
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(path.read_text(encoding="utf-8"))
+                cursor.execute("INSERT INTO schema_migrations (filename) VALUES (%s)", (path.name,))
+        return True
+    except Exception as e:
+        print(f"❌ {path.name} failed and was rolled back: {e}")
+        return False
+
+
+def run_migrations() -> bool:
+    done = applied_migrations()
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        if path.name in done:
+            continue
+        print(f"Applying {path.name}...")
+        if not apply_migration(path):
+            print("Later migrations were not applied")
+            return False
+        print(f"✅ {path.name} applied")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_migrations() else 1)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import requests
+
+from .session import make_session
+from .geocode_cache import get_geocode_cache
+
+
+POSTCODES_IO_BASE = "https://api.postcodes.io"
+# postcodes.io accepts at most 100 postcodes per bulk lookup
+BULK_SIZE = 100
+MAX_WORKERS = 4
+_POSTCODE_CACHE: Dict[str, Tuple[float, float]] = {}
+
+
+def clean_postcode(postcode: Optional[str]) -> str:
+    return str(postcode or "").replace(" ", "").upper()
+
+
+def _to_float(value: object) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _lookup_chunk(session: requests.Session, chunk: List[str]) -> Tuple[Dict[str, Tuple[float, float]], Set[str]]:
+    """Bulk-resolve one chunk. Returns (found, invalid); failed requests report neither."""
+    found: Dict[str, Tuple[float, float]] = {}
+    invalid: Set[str] = set()
+    try:
+        resp = session.post(f"{POSTCODES_IO_BASE}/postcodes", json={"postcodes": chunk}, timeout=20)
+        if resp.status_code != 200:
+            print(f"[Geocode] Bulk lookup returned {resp.status_code} for {len(chunk)} postcodes", flush=True)
+            return found, invalid
+        for item in resp.json().get("result") or []:
+            if not isinstance(item, dict):
+                continue
+            pc = clean_postcode(item.get("query"))
+            result = item.get("result")
+            lat = _to_float(result.get("latitude")) if isinstance(result, dict) else None
+            lng = _to_float(result.get("longitude")) if isinstance(result, dict) else None
+            if lat is not None and lng is not None:
+                found[pc] = (lat, lng)
+            elif pc:
+                invalid.add(pc)
+    except Exception as e:
+        print(f"[Geocode] Bulk lookup failed for {len(chunk)} postcodes: {e}", flush=True)
+    return found, invalid
+
+
+def geocode_postcodes(postcodes: Iterable[str], *, session: Optional[requests.Session] = None) -> Dict[str, Tuple[float, float]]:
+    """
+    Resolve postcodes to (lat, lng) with postcodes.io bulk lookups.
+
+    Postcodes are cleaned and deduplicated, then answered from the in-process cache,
+    the offline postcode index (if built), the persistent shared cache (including
+    known-invalid postcodes), and finally sent
+    100 at a time over a pooled session, several requests in flight. Network results
+    are written back to the shared cache. Returns a dict keyed by cleaned postcode;
+    unresolvable postcodes are omitted.
+    """
+    wanted = {clean_postcode(pc) for pc in postcodes}
+    wanted.discard("")
+    results = {pc: _POSTCODE_CACHE[pc] for pc in wanted if pc in _POSTCODE_CACHE}
+    missing = wanted - results.keys()
+    from .postcode_index import get_offline_index
+    offline = get_offline_index()
+    if offline is not None and missing:
+        local = offline.lookup_many(missing)
+        _POSTCODE_CACHE.update(local)
+        results.update(local)
+        missing -= local.keys()
+    cache = get_geocode_cache()
+    if cache is not None and missing:
+        cached, known_invalid = cache.get_many(missing)
+        _POSTCODE_CACHE.update(cached)
+        results.update(cached)
+        missing -= cached.keys() | known_invalid
+    if not missing:
+        return results
+
+    session = session or make_session()
+    ordered = sorted(missing)
+    chunks = [ordered[i:i + BULK_SIZE] for i in range(0, len(ordered), BULK_SIZE)]
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(chunks))) as pool:
+        for found, invalid in pool.map(lambda chunk: _lookup_chunk(session, chunk), chunks):
+            _POSTCODE_CACHE.update(found)
+            results.update(found)
+            if cache is not None:
+                cache.put_many(found, invalid)
+    print(f"[Geocode] Resolved {len(results)}/{len(wanted)} postcodes ({len(missing)} looked up)", flush=True)
+    if cache is not None:
+        print(f"[Geocode] Cache stats: {cache.stats()}", flush=True)
+    return results
+
+
+def geocode_rows(rows: List[Dict[str, str]], *, lat_key: str = "lat", lng_key: str = "lng", postcode_key: str = "postcode") -> int:
+    """Fill missing lat/lng on rows in place from their postcodes. Returns rows filled."""
+    pending = [r for r in rows if (not r.get(lat_key) or not r.get(lng_key)) and clean_postcode(r.get(postcode_key))]
+    if not pending:
+        return 0
+    coords = geocode_postcodes(r.get(postcode_key) for r in pending)
+    filled = 0
+    for row in pending:
+        latlng = coords.get(clean_postcode(row.get(postcode_key)))
+        if latlng is not None:
+            row[lat_key] = f"{latlng[0]}"
+            row[lng_key] = f"{latlng[1]}"
+            filled += 1
+    return filled
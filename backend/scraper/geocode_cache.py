@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "geocode_cache.sqlite"
+DEFAULT_TTL_DAYS = 90.0
+# Invalid postcodes are re-checked sooner in case they were newly issued
+DEFAULT_NEGATIVE_TTL_DAYS = 7.0
+
+
+class GeocodeCache:
+    """
+    Persistent postcode -> (lat, lng) cache shared by every scraper process.
+
+    Backed by a SQLite file in WAL mode so concurrent scrapers (GitHub Actions runs,
+    API-spawned subprocesses) can read and write it safely. Invalid postcodes are stored
+    with NULL coordinates (negative caching); entries older than their TTL count as misses.
+    """
+
+    def __init__(self, path: Path | str | None = None, *, ttl_days: Optional[float] = None, negative_ttl_days: Optional[float] = None):
+        self.path = Path(path or os.getenv("GEOCODE_CACHE_PATH") or DEFAULT_CACHE_PATH)
+        self.ttl_seconds = 86400 * (ttl_days if ttl_days is not None else float(os.getenv("GEOCODE_CACHE_TTL_DAYS", DEFAULT_TTL_DAYS)))
+        self.negative_ttl_seconds = 86400 * (
+            negative_ttl_days if negative_ttl_days is not None
+            else float(os.getenv("GEOCODE_CACHE_NEGATIVE_TTL_DAYS", DEFAULT_NEGATIVE_TTL_DAYS))
+        )
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postcode_geocodes ("
+            " postcode TEXT PRIMARY KEY,"
+            " lat REAL,"
+            " lng REAL,"
+            " fetched_at REAL NOT NULL"
+            ")"
+        )
+        self._conn.commit()
+
+    def get_many(self, postcodes: Iterable[str]) -> Tuple[Dict[str, Tuple[float, float]], Set[str]]:
+        """Return (coordinates, known_invalid) for the fresh entries among cleaned postcodes"""
+        wanted = list(dict.fromkeys(pc for pc in postcodes if pc))
+        found: Dict[str, Tuple[float, float]] = {}
+        invalid: Set[str] = set()
+        now = time.time()
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(wanted), 500):
+                chunk = wanted[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT postcode, lat, lng, fetched_at FROM postcode_geocodes WHERE postcode IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for pc, lat, lng, fetched_at in rows:
+                    if lat is None or lng is None:
+                        if now - fetched_at < self.negative_ttl_seconds:
+                            invalid.add(pc)
+                    elif now - fetched_at < self.ttl_seconds:
+                        found[pc] = (lat, lng)
+            self.hits += len(found)
+            self.negative_hits += len(invalid)
+            self.misses += len(wanted) - len(found) - len(invalid)
+        return found, invalid
+
+    def put_many(self, found: Dict[str, Tuple[float, float]], invalid: Iterable[str] = ()) -> None:
+        now = time.time()
+        rows = [(pc, lat, lng, now) for pc, (lat, lng) in found.items()]
+        rows += [(pc, None, None, now) for pc in invalid]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO postcode_geocodes (postcode, lat, lng, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(postcode) DO UPDATE SET lat = excluded.lat, lng = excluded.lng, fetched_at = excluded.fetched_at",
+                rows,
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete entries past their TTL, returning how many were removed"""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM postcode_geocodes WHERE (lat IS NULL AND fetched_at < ?) OR (lat IS NOT NULL AND fetched_at < ?)",
+                (now - self.negative_ttl_seconds, now - self.ttl_seconds),
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, negatives = self._conn.execute(
+                "SELECT COUNT(*), SUM(CASE WHEN lat IS NULL THEN 1 ELSE 0 END) FROM postcode_geocodes"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "entries": entries or 0,
+            "negative_entries": negatives or 0,
+        }
+
+
+_shared_cache: Optional[GeocodeCache] = None
+
+
+def get_geocode_cache() -> Optional[GeocodeCache]:
+    """Process-wide cache instance, or None if the cache file can't be opened"""
+    global _shared_cache
+    if _shared_cache is None:
+        try:
+            _shared_cache = GeocodeCache()
+        except Exception as e:
+            print(f"[Geocode] Persistent cache unavailable: {e}", flush=True)
+            return None
+    return _shared_cache
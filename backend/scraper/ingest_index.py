@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def _norm_authority(authority: Optional[str]) -> str:
+    """Normalise an authority so "East Riding" and "EastRiding" compare equal"""
+    return re.sub(r"[^a-z0-9]", "", str(authority or "").lower())
+
+
+def _pair_alias(authority: Optional[str], uid: Optional[str]) -> Optional[str]:
+    auth = _norm_authority(authority)
+    uid = str(uid or "").strip()
+    if not auth or not uid:
+        return None
+    return f"{auth}|{uid}"
+
+
+def _name_pair_alias(name: Optional[str]) -> Optional[str]:
+    # PlanIt names are "<AreaCode>/<uid>", e.g. "Rhondda/25/0981/FUL"
+    name = str(name or "").strip()
+    if "/" not in name:
+        return None
+    prefix, rest = name.split("/", 1)
+    return _pair_alias(prefix, rest)
+
+
+class IngestIndex:
+    """
+    Canonical-key index over PlanIt applications.
+
+    The same application can reach us as PlanIt's ``name`` ("Rhondda/25/0981/FUL"),
+    as a bare ``uid`` ("25/0981/FUL") plus authority, or as a legacy DB row that stored
+    either of those in its ``uid`` column. Every alias is mapped to one canonical key
+    (the key already stored in the DB if there is one, otherwise the PlanIt name), so
+    writers can dedupe in O(1) per record and always upsert on the same ``uid``.
+    """
+
+    def __init__(self):
+        self._aliases: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(set(self._aliases.values()))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._aliases
+
+    def _aliases_for(self, name: Optional[str], uid: Optional[str], authority: Optional[str]) -> Iterable[str]:
+        name = str(name or "").strip()
+        uid = str(uid or "").strip()
+        if name:
+            yield name
+            alias = _name_pair_alias(name)
+            if alias:
+                yield alias
+        if not uid:
+            return
+        auth = _norm_authority(authority)
+        if not auth:
+            # Bare uids are only unique within an authority, so match them exactly
+            yield uid
+            return
+        yield f"{auth}|{uid}"
+        if "/" in uid and _norm_authority(uid.split("/", 1)[0]) == auth:
+            # Legacy rows stored the full PlanIt name in the uid column
+            yield uid
+            yield _name_pair_alias(uid)
+
+    def lookup(self, name: Optional[str] = None, uid: Optional[str] = None, authority: Optional[str] = None) -> Optional[str]:
+        """Return the canonical key already known for this record, or None"""
+        for alias in self._aliases_for(name, uid, authority):
+            key = self._aliases.get(alias)
+            if key is not None:
+                return key
+        return None
+
+    def resolve(self, name: Optional[str] = None, uid: Optional[str] = None, authority: Optional[str] = None) -> Tuple[Optional[str], bool]:
+        """
+        Resolve a record to its canonical key.
+
+        Returns (key, known) where ``known`` says whether the key was already indexed.
+        Unknown records get their PlanIt name (or uid if no name) as key and are indexed,
+        so duplicates later in the same batch resolve as known.
+        """
+        key = self.lookup(name, uid, authority)
+        if key is not None:
+            self.add(key, name, uid, authority)
+            return key, True
+        key = str(name or "").strip() or str(uid or "").strip() or None
+        if key is None:
+            return None, False
+        self.add(key, name, uid, authority)
+        return key, False
+
+    def add(self, key: str, name: Optional[str] = None, uid: Optional[str] = None, authority: Optional[str] = None) -> None:
+        self._aliases.setdefault(key, key)
+        for alias in self._aliases_for(name, uid, authority):
+            self._aliases.setdefault(alias, key)
+
+    def add_db_row(self, row: Dict) -> None:
+        """Index a row read back from planit_renewables / planit_datacentres"""
+        key = str(row.get("uid") or "").strip() or str(row.get("name") or "").strip()
+        if key:
+            self.add(key, row.get("name"), row.get("uid"), row.get("area_name"))
+
+    @classmethod
+    def for_records(cls, db, table: str, records: Iterable[Tuple[Optional[str], Optional[str], Optional[str]]]) -> "IngestIndex":
+        """
+        Build an index covering only the existing rows that could match the given
+        (name, uid, authority) candidates, so lookups cost O(batch) rather than O(table).
+        Raises if the lookup fails, rather than resolving every record as new.
+        """
+        keys = set()
+        for name, uid, _ in records:
+            keys.update(k for k in (str(name or "").strip(), str(uid or "").strip()) if k)
+        index = cls()
+        for row in db.select_by_keys(table, ["uid", "name", "area_name"], ["uid", "name"], sorted(keys)):
+            index.add_db_row(row)
+        return index
@@ -1,9 +1,18 @@
 from __future__ import annotations
 
 import csv
+import json
 from pathlib import Path
 from typing import Iterable, Dict
 
+# Prefix of the machine-readable progress lines the API's refresh jobs parse (backend/jobs.py)
+PROGRESS_PREFIX = "@@progress "
+
+
+def report_progress(**counts: int) -> None:
+    """Print counters such as pages=, rows_fetched=, rows_written= for a refresh job to pick up"""
+    print(PROGRESS_PREFIX + json.dumps(counts), flush=True)
+
 
 def save_csv(path: Path | str, rows: Iterable[Dict[str, str]]) -> None:
     path = Path(path)
@@ -45,5 +45,7 @@ def normalize_facility(data: Dict) -> Dict[str, str]:
         "city": data.get("city", ""),
         "country": data.get("country", ""),
         "postal_code": data.get("zipcode", ""),
+        "latitude": "" if data.get("latitude") is None else str(data.get("latitude")),
+        "longitude": "" if data.get("longitude") is None else str(data.get("longitude")),
     }
 
@@ -7,6 +7,7 @@ from urllib.parse import urlencode
 import requests
 
 from .session import make_session
+from .io import report_progress
 
 
 class PlanItAPIError(Exception):
@@ -98,6 +99,7 @@ def fetch_datacentres_from_planit_api() -> List[Dict]:
 
             # Add results to our collection
             all_results.extend(records)
+            report_progress(pages=page, rows_fetched=len(all_results), rows_total=total_found)
 
             # Check if we got all results (if we got less than page size, we're done)
             if len(records) < 300 or to_idx >= total_found - 1:
@@ -7,7 +7,7 @@ from typing import Dict, List, Tuple, Optional
 from urllib.parse import urlencode
 
 from .session import make_session
-import requests
+from .geocode import clean_postcode, geocode_postcodes, geocode_rows
 
 
 class RateLimitExceeded(Exception):
@@ -21,7 +21,6 @@ PLANIT_BASE = "https://www.planit.org.uk"
 # Simplified search terms to avoid 400 errors
 SEARCH_TERMS = "solar or photovoltaic or battery"
 PAGE_SIZE = 100
-_POSTCODE_CACHE: Dict[str, Tuple[float, float]] = {}
 
 
 def month_range_backwards(months: int) -> List[Tuple[date, date]]:
@@ -94,26 +93,10 @@ def fetch_page(session, start: date, end: date, page: int) -> Dict:
 
 
 def _postcode_to_latlng(postcode: str) -> Optional[Tuple[float, float]]:
-    pc = postcode.replace(" ", "").upper()
+    pc = clean_postcode(postcode)
     if not pc:
         return None
-    if pc in _POSTCODE_CACHE:
-        return _POSTCODE_CACHE[pc]
-    try:
-        url = f"https://api.postcodes.io/postcodes/{pc}"
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            result = data.get("result")
-            if isinstance(result, dict):
-                lat = _to_float(result.get("latitude"))
-                lng = _to_float(result.get("longitude"))
-                if lat is not None and lng is not None:
-                    _POSTCODE_CACHE[pc] = (lat, lng)
-                    return _POSTCODE_CACHE[pc]
-    except Exception:
-        return None
-    return None
+    return geocode_postcodes([pc]).get(pc)
 
 
 def _parse_float_from_text(value: str) -> Optional[float]:
@@ -244,10 +227,12 @@ def fetch_all_major_renewables_last_n_years(years: int = 2, *, enable_geocode: b
             if not records:
                 print(f"[PlanIt] No records for {start}..{end} page {page}", flush=True)
                 break
+            page_rows: List[Dict[str, str]] = []
             for rec in records:
                 props = rec["properties"] if isinstance(rec, dict) and "properties" in rec else rec
                 geom = rec.get("geometry") if isinstance(rec, dict) else None
-                row = normalize(props, geometry=geom, enable_geocode=enable_geocode)
+                # Geocoding is batched per page below instead of one request per record
+                row = normalize(props, geometry=geom, enable_geocode=False)
                 # size filter: include only Large / Very Large when present
                 size_val = (row.get("app_size") or "").strip().lower()
                 if size_val and size_val not in {"large", "very large"}:
@@ -263,6 +248,10 @@ def fetch_all_major_renewables_last_n_years(years: int = 2, *, enable_geocode: b
                     sa = None
                 if sa is not None and sa < 20.0:
                     continue
+                page_rows.append(row)
+            if enable_geocode:
+                geocode_rows(page_rows)
+            for row in page_rows:
                 rid = row.get("id")
                 if rid:
                     seen[rid] = row
@@ -300,10 +289,12 @@ def fetch_all_major_renewables_last_n_months(months: int = 1, *, enable_geocode:
             if not records:
                 print(f"[PlanIt] No records for {start}..{end} page {page}", flush=True)
                 break
+            page_rows: List[Dict[str, str]] = []
             for rec in records:
                 props = rec["properties"] if isinstance(rec, dict) and "properties" in rec else rec
                 geom = rec.get("geometry") if isinstance(rec, dict) else None
-                row = normalize(props, geometry=geom, enable_geocode=enable_geocode)
+                # Geocoding is batched per page below instead of one request per record
+                row = normalize(props, geometry=geom, enable_geocode=False)
                 size_val = (row.get("app_size") or "").strip().lower()
                 if size_val and size_val not in {"large", "very large"}:
                     continue
@@ -316,6 +307,10 @@ def fetch_all_major_renewables_last_n_months(months: int = 1, *, enable_geocode:
                     sa = None
                 if sa is not None and sa < 20.0:
                     continue
+                page_rows.append(row)
+            if enable_geocode:
+                geocode_rows(page_rows)
+            for row in page_rows:
                 rid = row.get("id")
                 if rid:
                     seen[rid] = row
@@ -367,10 +362,12 @@ def fetch_major_renewables_last_complete_month(*, enable_geocode: bool = True) -
         if not records:
             print(f"[PlanIt] No records for {start}..{end} page {page}", flush=True)
             break
+        page_rows: List[Dict[str, str]] = []
         for rec in records:
             props = rec["properties"] if isinstance(rec, dict) and "properties" in rec else rec
             geom = rec.get("geometry") if isinstance(rec, dict) else None
-            row = normalize(props, geometry=geom, enable_geocode=enable_geocode)
+            # Geocoding is batched per page below instead of one request per record
+            row = normalize(props, geometry=geom, enable_geocode=False)
             size_val = (row.get("app_size") or "").strip().lower()
             if size_val and size_val not in {"large", "very large"}:
                 continue
@@ -383,6 +380,10 @@ def fetch_major_renewables_last_complete_month(*, enable_geocode: bool = True) -
                 sa = None
             if sa is not None and sa < 20.0:
                 continue
+            page_rows.append(row)
+        if enable_geocode:
+            geocode_rows(page_rows)
+        for row in page_rows:
             rid = row.get("id")
             if rid:
                 seen[rid] = row
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import csv
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from .geocode import clean_postcode
+
+
+DEFAULT_INDEX_PATH = Path(__file__).parent.parent.parent / "postcode_index.bin"
+MAGIC = b"PCIDX001"
+HEADER = struct.Struct("<8sI")
+# Cleaned postcode (space-padded to 7 chars), latitude, longitude
+RECORD = struct.Struct("<7sff")
+# ONSPD/NSPL use 99.999999 for postcodes without a grid reference
+_NO_LOCATION_LAT = 99.0
+
+
+def _key(postcode: str) -> Optional[bytes]:
+    pc = clean_postcode(postcode)
+    if not pc or len(pc) > 7:
+        return None
+    return pc.ljust(7).encode("ascii", "ignore")
+
+
+def build_postcode_index(csv_paths: Iterable[Path | str], out_path: Path | str = DEFAULT_INDEX_PATH) -> int:
+    """
+    Build a sorted fixed-width postcode index from ONS NSPL/ONSPD CSV files.
+
+    Reads the ``pcds`` (or ``pcd``/``pcd7``) postcode column and the ``lat``/``long``
+    centroid columns, skips postcodes without a location and writes the records sorted
+    by postcode so lookups can binary-search a memory map. Returns the record count.
+    """
+    records: Dict[bytes, Tuple[float, float]] = {}
+    for csv_path in csv_paths:
+        with open(csv_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                key = _key(row.get("pcds") or row.get("pcd") or row.get("pcd7") or "")
+                try:
+                    lat = float(row.get("lat") or "")
+                    lng = float(row.get("long") or row.get("lng") or "")
+                except ValueError:
+                    continue
+                if key is None or lat >= _NO_LOCATION_LAT:
+                    continue
+                records[key] = (lat, lng)
+
+    out_path = Path(out_path)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records)))
+        for key in sorted(records):
+            lat, lng = records[key]
+            f.write(RECORD.pack(key, lat, lng))
+    os.replace(tmp_path, out_path)
+    return len(records)
+
+
+class OfflinePostcodeIndex:
+    """Memory-mapped, binary-searched postcode centroid lookups with no network access"""
+
+    def __init__(self, path: Path | str = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a postcode index")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key_at(self, i: int) -> bytes:
+        offset = HEADER.size + i * RECORD.size
+        return self._mm[offset:offset + 7]
+
+    def lookup(self, postcode: str) -> Optional[Tuple[float, float]]:
+        key = _key(postcode)
+        if key is None:
+            return None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == key:
+            _, lat, lng = RECORD.unpack_from(self._mm, HEADER.size + lo * RECORD.size)
+            # float32 storage is good to ~0.5m; trim the noise digits it adds
+            return (round(lat, 6), round(lng, 6))
+        return None
+
+    def lookup_many(self, postcodes: Iterable[str]) -> Dict[str, Tuple[float, float]]:
+        found: Dict[str, Tuple[float, float]] = {}
+        for pc in postcodes:
+            latlng = self.lookup(pc)
+            if latlng is not None:
+                found[clean_postcode(pc)] = latlng
+        return found
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+
+_offline_index: Optional[OfflinePostcodeIndex] = None
+_offline_checked = False
+
+
+def get_offline_index() -> Optional[OfflinePostcodeIndex]:
+    """Process-wide offline index, or None if no index file has been built"""
+    global _offline_index, _offline_checked
+    if not _offline_checked:
+        _offline_checked = True
+        path = Path(os.getenv("POSTCODE_INDEX_PATH") or DEFAULT_INDEX_PATH)
+        if path.exists():
+            try:
+                _offline_index = OfflinePostcodeIndex(path)
+                print(f"[Geocode] Loaded offline postcode index ({len(_offline_index)} postcodes)", flush=True)
+            except Exception as e:
+                print(f"[Geocode] Offline postcode index unavailable: {e}", flush=True)
+    return _offline_index
+
+
+if __name__ == "__main__":
+    """
+    Build the offline index from ONS NSPL/ONSPD CSVs:
+        python -m backend.scraper.postcode_index NSPL_MAY_2025_UK.csv [more.csv ...]
+    Writes to POSTCODE_INDEX_PATH or postcode_index.bin at the repo root.
+    """
+    if len(sys.argv) < 2:
+        print("Usage: python -m backend.scraper.postcode_index <nspl.csv> [more.csv ...]")
+        sys.exit(1)
+    target = Path(os.getenv("POSTCODE_INDEX_PATH") or DEFAULT_INDEX_PATH)
+    count = build_postcode_index(sys.argv[1:], target)
+    print(f"[Geocode] Wrote {count} postcodes to {target}")
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import sys
+import os
+from .geocode import clean_postcode, geocode_postcodes
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database import db
+from snapshots import publish_snapshots
+
+
+TABLES = ["planit_renewables", "planit_datacentres"]
+BATCH_SIZE = 500
+
+
+def enrich_table(table: str, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Geocode rows of `table` that have a postcode but no coordinates.
+
+    Walks the table in id order (keyset pagination, so each batch is an indexed range
+    scan), resolves each batch's postcodes in bulk and writes the coordinates back with
+    one bulk UPDATE per batch (db.update_coordinates). Returns the number of rows updated.
+    """
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.execute_query(
+            f"SELECT id, postcode FROM {table} "
+            "WHERE (latitude IS NULL OR longitude IS NULL) "
+            "AND postcode IS NOT NULL AND postcode <> '' AND id > %s "
+            "ORDER BY id LIMIT %s",
+            (last_id, batch_size),
+        )
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+
+        coords = geocode_postcodes(row["postcode"] for row in rows)
+        values = []
+        for row in rows:
+            latlng = coords.get(clean_postcode(row["postcode"]))
+            if latlng is not None:
+                values.append((row["id"], latlng[0], latlng[1]))
+
+        if values:
+            updated += db.update_coordinates(table, values)
+        print(f"[Geocode Enrichment] {table}: batch up to id {last_id}, {len(values)}/{len(rows)} geocoded", flush=True)
+
+        if len(rows) < batch_size:
+            break
+    return updated
+
+
+if __name__ == "__main__":
+    """
+    Fill in latitude/longitude for PlanIt rows that were written without coordinates.
+    Runs separately from the scrapers so geocoding never sits on their critical path.
+    """
+    print("[Geocode Enrichment] 🚀 Starting geocoding enrichment...")
+    try:
+        for table in TABLES:
+            count = enrich_table(table)
+            print(f"[Geocode Enrichment] ✅ {table}: updated {count} rows with coordinates")
+            if count:
+                db.refresh_read_models(table)
+                publish_snapshots(db, table)
+    except Exception as e:
+        print(f"[Geocode Enrichment] ❌ Error: {e}")
+        sys.exit(1)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 from .peeringdb import fetch_ix_gb, normalize_ix
-from .io import save_csv
+from .io import save_csv, report_progress
 
 
 if __name__ == "__main__":
@@ -10,4 +10,5 @@ if __name__ == "__main__":
     out = Path(__file__).parent.parent.parent / "peeringdb_ix_gb.csv"
     save_csv(out, rows)
     print(f"Saved {len(rows)} IX rows to {out}")
+    report_progress(rows_fetched=len(rows), rows_written=len(rows))
 
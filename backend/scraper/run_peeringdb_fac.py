@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from pathlib import Path
 from .peeringdb import fetch_facilities_gb, normalize_facility
-from .io import save_csv
+from .io import save_csv, report_progress
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from database import db
+from snapshots import publish_snapshots
 
 
 def _map_fields_for_database(rows):
@@ -23,6 +24,8 @@ def _map_fields_for_database(rows):
             'city': 'city',
             'country': 'country',
             'postal_code': 'zipcode',
+            'latitude': 'latitude',
+            'longitude': 'longitude',
         }
 
         for csv_field, db_field in field_mapping.items():
@@ -41,48 +44,66 @@ if __name__ == "__main__":
     print("[PeeringDB Facilities] 🚀 Starting PeeringDB facilities fetch...")
 
     try:
-        # Read existing data from database
-        existing_records = db.execute_query("SELECT * FROM peeringdb_fac_gb")
-        existing_ids = set()
-
-        # Collect existing PeeringDB IDs
-        for row in existing_records:
-            if 'peeringdb_id' in row and row['peeringdb_id']:
-                existing_ids.add(str(row['peeringdb_id']))
-
-        print(f"[PeeringDB Facilities] 📋 Found {len(existing_records)} existing records in database")
+        existing_count = db.count_rows("peeringdb_fac_gb")
+        print(f"[PeeringDB Facilities] 📋 Found {existing_count} existing records in database")
 
         # Fetch facilities from PeeringDB API
         raw_facilities = fetch_facilities_gb()
         print(f"[PeeringDB Facilities] 🔄 Processing {len(raw_facilities)} API results...")
+        report_progress(rows_fetched=len(raw_facilities))
 
         # Process new results
         all_facilities = [normalize_facility(f) for f in raw_facilities]
-        new_records = []
-        new_count = 0
 
-        for facility in all_facilities:
-            # Check if this is a new record using PeeringDB ID
-            peeringdb_id = facility.get('id', '')
-            if peeringdb_id and str(peeringdb_id) not in existing_ids:
-                new_records.append(facility)
-                new_count += 1
+        # Ask the database which of this batch's PeeringDB IDs it doesn't have yet. If that
+        # fails, stop: treating every facility as known would upsert coordinate-only rows
+        candidate_ids = [int(f['id']) for f in all_facilities if str(f.get('id', '')).isdigit()]
+        try:
+            unknown_ids = {str(i) for i in db.unknown_keys("peeringdb_fac_gb", "peeringdb_id", candidate_ids, key_type='integer')}
+        except Exception as e:
+            print(f"[PeeringDB Facilities] ❌ Could not look up existing facilities, nothing saved: {e}")
+            sys.exit(1)
+        new_records = [f for f in all_facilities if str(f.get('id', '')) in unknown_ids]
+        new_count = len(new_records)
 
         print(f"[PeeringDB Facilities] ✨ Found {new_count} new records to add")
 
+        changed = False
+
         # Save new records to database
         if new_records:
             print(f"[PeeringDB Facilities] 💾 Saving {len(new_records)} new records to database...")
             mapped_new = _map_fields_for_database(new_records)
-            success = db.execute_upsert("peeringdb_fac_gb", mapped_new)
+            success = db.execute_upsert("peeringdb_fac_gb", mapped_new, ['peeringdb_id'])
             if success:
                 print(f"[PeeringDB Facilities] ✅ Successfully saved {len(new_records)} new records to database")
+                report_progress(rows_written=len(new_records))
+                changed = True
             else:
                 print(f"[PeeringDB Facilities] ❌ Failed to save to database")
         else:
             print(f"[PeeringDB Facilities] ℹ️ No new records to save")
 
-        total_count = len(existing_records) + new_count
+        # Facilities saved before coordinates were stored still have NULL latitude/longitude,
+        # so refresh the coordinates of every known facility the API returned
+        known_records = [f for f in all_facilities
+                         if str(f.get('id', '')).isdigit() and str(f.get('id')) not in unknown_ids]
+        coordinates = [
+            {'peeringdb_id': row['peeringdb_id'], 'latitude': row['latitude'], 'longitude': row['longitude']}
+            for row in _map_fields_for_database(known_records)
+            if 'latitude' in row and 'longitude' in row
+        ]
+        if coordinates:
+            if db.execute_upsert("peeringdb_fac_gb", coordinates, ['peeringdb_id']):
+                print(f"[PeeringDB Facilities] 📍 Updated coordinates of {len(coordinates)} existing facilities")
+                changed = True
+            else:
+                print(f"[PeeringDB Facilities] ❌ Failed to update coordinates of existing facilities")
+
+        if changed:
+            publish_snapshots(db, "peeringdb_fac_gb")
+
+        total_count = existing_count + new_count
         print(f"[PeeringDB Facilities] ✅ Success! Database now contains {total_count} total facilities")
 
         # Summary stats for new records only
@@ -8,11 +8,14 @@ from .planit_api_datacentres import (
     PlanItAPIError,
     PlanItAPIRateLimit,
 )
-from .io import save_csv
+from .io import save_csv, report_progress
+from .ingest_index import IngestIndex
+from .geocode import geocode_rows
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from database import db
+from snapshots import publish_snapshots
 
 
 def _map_fields_for_database(rows):
@@ -63,58 +66,65 @@ if __name__ == "__main__":
     try:
         print("[PlanIt API Datacentres] 🚀 Starting accumulative PlanIt API search...")
 
-        # Read existing data from database
-        existing_records = db.execute_query("SELECT * FROM planit_datacentres")
-        existing_ids = set()
-
-        # Collect existing IDs (fix the elif bug)
-        for row in existing_records:
-            if 'id' in row and row['id']:
-                existing_ids.add(row['id'])
-            if 'uid' in row and row['uid']:  # Use both id and uid
-                existing_ids.add(row['uid'])
-
-        print(f"[PlanIt API Datacentres] 📋 Found {len(existing_records)} existing records in database")
+        existing_count = db.count_rows("planit_datacentres")
+        print(f"[PlanIt API Datacentres] 📋 Found {existing_count} existing records in database")
 
         # Use the PlanIt API with datacentre search terms
         raw_results = fetch_datacentres_from_planit_api()
 
         print(f"[PlanIt API Datacentres] 🔄 Processing {len(raw_results)} API results...")
+        report_progress(rows_fetched=len(raw_results))
 
-        # Process new results
-        new_records = []
-        new_count = 0
+        normalized_records = []
         for raw_record in raw_results:
             try:
-                normalized = normalize_planit_datacentres_result(raw_record)
-
-                # Check if this is a new record (try id first, then uid)
-                record_id = normalized.get('id', '') or normalized.get('uid', '')
-                if record_id and record_id not in existing_ids:
-                    normalized['is_new'] = 'true'
-                    new_records.append(normalized)
-                    new_count += 1
-                # If it's an existing record, we don't need to add it again
-
+                normalized_records.append(normalize_planit_datacentres_result(raw_record))
             except Exception as e:
                 print(f"[PlanIt API Datacentres] ⚠️ Error normalizing record: {e}")
                 continue
 
+        # Index only the existing rows these candidates could match, so dedup cost
+        # scales with the batch, not the table
+        candidates = [(r.get('name'), r.get('uid'), r.get('area_name')) for r in normalized_records]
+        index = IngestIndex.for_records(db, "planit_datacentres", candidates)
+
+        # Process new results
+        new_records = []
+        new_count = 0
+        for normalized, (name, uid, area_name) in zip(normalized_records, candidates):
+            # Check if this is a new record (resolves name/uid/authority to one key)
+            record_id, known = index.resolve(name, uid, area_name)
+            if record_id and not known:
+                normalized['uid'] = record_id
+                normalized['is_new'] = 'true'
+                new_records.append(normalized)
+                new_count += 1
+            # If it's an existing record, we don't need to add it again
+
         print(f"[PlanIt API Datacentres] ✨ Found {new_count} new records to add")
 
+        # Fill coordinates PlanIt didn't supply with one batch of postcode lookups
+        if new_records:
+            filled = geocode_rows(new_records)
+            print(f"[PlanIt API Datacentres] 📍 Geocoded {filled} new records from postcodes")
+
         # Save new records to database
         if new_records:
             print(f"[PlanIt API Datacentres] 💾 Saving {len(new_records)} new records to database...")
             mapped_new = _map_fields_for_database(new_records)
-            success = db.execute_upsert("planit_datacentres", mapped_new)
+            db.ensure_partitions("planit_datacentres", [r.get('start_date') for r in mapped_new])
+            success = db.execute_upsert("planit_datacentres", mapped_new, ['uid'])
             if success:
                 print(f"[PlanIt API Datacentres] ✅ Successfully saved {len(new_records)} new records to database")
+                report_progress(rows_written=len(new_records))
+                db.refresh_read_models("planit_datacentres")
+                publish_snapshots(db, "planit_datacentres")
             else:
                 print(f"[PlanIt API Datacentres] ❌ Failed to save to database")
         else:
             print(f"[PlanIt API Datacentres] ℹ️ No new records to save")
 
-        total_count = len(existing_records) + new_count
+        total_count = existing_count + new_count
         print(f"[PlanIt API Datacentres] ✅ Success! Database now contains {total_count} total datacentre projects")
 
         # Summary stats for new records only
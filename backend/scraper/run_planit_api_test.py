@@ -10,11 +10,14 @@ from .planit_api_scraper import (
     PlanItAPIError,
     PlanItAPIRateLimit,
 )
-from .io import save_csv
+from .io import save_csv, report_progress
+from .ingest_index import IngestIndex
+from .geocode import geocode_rows
 
 # Add parent directory to path for database import
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from database import db
+from snapshots import publish_snapshots
 
 
 def _map_fields_for_database(rows):
@@ -70,47 +73,55 @@ if __name__ == "__main__":
     try:
         print("[PlanIt API Test] 🚀 Starting PlanIt API renewables test2 scraper...")
 
-        # Get existing IDs from database (check all scrapers since UIDs are unique across all)
-        existing_db_records = db.execute_query("SELECT id, uid FROM planit_renewables") or []
-        existing_ids = set()
-        for record in existing_db_records:
-            # Add both id and uid to the set (use both, not elif)
-            if record.get('id'):
-                existing_ids.add(record['id'])
-            if record.get('uid'):
-                existing_ids.add(record['uid'])
-
-        print(f"[PlanIt API Test] 📋 Found {len(existing_db_records)} existing records in database")
+        existing_count = db.count_rows("planit_renewables")
+        print(f"[PlanIt API Test] 📋 Found {existing_count} existing records in database")
 
         # Fetch new data from API
         raw_results = fetch_renewables_from_planit_api()
         print(f"[PlanIt API Test] 🔄 Processing {len(raw_results)} API results...")
+        report_progress(rows_fetched=len(raw_results))
 
-        # Process and filter new records
-        new_records = []
+        normalized_records = []
         for raw_record in raw_results:
             try:
-                normalized = normalize_planit_api_result(raw_record)
-
-                # Check if this is a new record
-                record_id = normalized.get('id', '') or normalized.get('uid', '')
-                if record_id and record_id not in existing_ids:
-                    normalized['is_new'] = 'true'
-                    new_records.append(normalized)
-
+                normalized_records.append(normalize_planit_api_result(raw_record))
             except Exception as e:
                 print(f"[PlanIt API Test] ⚠️ Error normalizing record: {e}")
                 continue
 
+        # Index only the existing rows these candidates could match (shared with the other
+        # PlanIt renewables writers), so dedup cost scales with the batch, not the table
+        candidates = [(r.get('name'), r.get('uid'), r.get('area_name')) for r in normalized_records]
+        index = IngestIndex.for_records(db, "planit_renewables", candidates)
+
+        # Process and filter new records
+        new_records = []
+        for normalized, (name, uid, area_name) in zip(normalized_records, candidates):
+            # Check if this is a new record (resolves name/uid/authority to one key)
+            record_id, known = index.resolve(name, uid, area_name)
+            if record_id and not known:
+                normalized['uid'] = record_id
+                normalized['is_new'] = 'true'
+                new_records.append(normalized)
+
         print(f"[PlanIt API Test] ✨ Found {len(new_records)} new records to add")
 
+        # Fill coordinates PlanIt didn't supply with one batch of postcode lookups
+        if new_records:
+            filled = geocode_rows(new_records)
+            print(f"[PlanIt API Test] 📍 Geocoded {filled} new records from postcodes")
+
         # Save to database
         if new_records:
             print(f"[PlanIt API Test] 💾 Saving {len(new_records)} new records to database...")
             mapped_rows = _map_fields_for_database(new_records)
-            success = db.execute_upsert("planit_renewables", mapped_rows)
+            db.ensure_partitions("planit_renewables", [r.get('start_date') for r in mapped_rows])
+            success = db.execute_upsert("planit_renewables", mapped_rows, ['uid'])
             if success:
                 print(f"[PlanIt API Test] ✅ Successfully saved {len(new_records)} new records to database")
+                report_progress(rows_written=len(new_records))
+                db.refresh_read_models("planit_renewables")
+                publish_snapshots(db, "planit_renewables")
             else:
                 print(f"[PlanIt API Test] ❌ Failed to save to database")
         else:
@@ -121,7 +132,7 @@ if __name__ == "__main__":
         if all_records:
             save_csv(output_path, all_records)
 
-        total_in_db = len(existing_db_records) + len(new_records)
+        total_in_db = existing_count + len(new_records)
         print(f"[PlanIt API Test] ✅ Success! Database now contains {total_in_db} total renewables test2 records")
 
         # Summary stats for new records only
@@ -3,20 +3,23 @@ from __future__ import annotations
 from pathlib import Path
 from datetime import date, timedelta
 from .planit_renewables import fetch_page, normalize, RateLimitExceeded
+from .geocode import geocode_rows
 from .session import make_session
-from .io import save_csv
+from .io import save_csv, report_progress
+from .ingest_index import IngestIndex
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from database import db
+from snapshots import publish_snapshots
 
 
-def fetch_recent_renewables_limited(days_back: int = 30, max_pages: int = 3) -> list:
+def fetch_recent_renewables_limited(days_back: int = 30, max_pages: int = 3, *, enable_geocode: bool = True) -> list:
     """
     Fetch only recent renewables with strict limits for dashboard refresh
     - Only look back specified days
     - Limit to max_pages to prevent runaway scraping
-    - No geocoding for speed
+    - Missing coordinates are geocoded in one batch at the end
     """
     session = make_session()
 
@@ -61,6 +64,7 @@ def fetch_recent_renewables_limited(days_back: int = 30, max_pages: int = 3) ->
                     seen[id_val] = row
 
             print(f"[PlanIt Daily] Cumulative records: {len(seen)}")
+            report_progress(pages=page, pages_total=max_pages, rows_fetched=len(seen))
 
             # If we got less than the page size, we're done
             if len(records) < 100:  # PAGE_SIZE
@@ -76,19 +80,30 @@ def fetch_recent_renewables_limited(days_back: int = 30, max_pages: int = 3) ->
             print(f"[PlanIt Daily] Error on page {page}: {e}")
             break
 
-    return list(seen.values())
+    rows = list(seen.values())
+    if enable_geocode:
+        filled = geocode_rows(rows)
+        print(f"[PlanIt Daily] Geocoded {filled} records from postcodes")
+    return rows
 
 
-def _map_fields_for_database(rows):
+def _map_fields_for_database(rows, index: IngestIndex):
     """Map CSV fields to database schema fields (conservative mapping)"""
     mapped_rows = []
     for row in rows:
         mapped_row = {}
 
-        # Only use fields that definitely exist in database (minimal set)
+        # Normalized 'id' is PlanIt's name; resolve it to the canonical uid so the
+        # row lands on the same key as records written by the other PlanIt scrapers
+        uid, _ = index.resolve(row.get('id'), None, row.get('authority'))
+        if not uid:
+            continue
+        mapped_row['uid'] = uid
+        mapped_row['name'] = row.get('id', '')
+
+        # Only use fields that definitely exist in database (minimal set). There is no
+        # title column; name holds the PlanIt name set above
         field_mapping = {
-            'id': 'id',
-            'title': 'title',
             'description': 'description',
             'app_type': 'app_type',
             'app_size': 'app_size',
@@ -118,7 +133,7 @@ def _map_fields_for_database(rows):
 
 
 if __name__ == "__main__":
-    """Super fast version: just last 30 days, max 3 pages, no geocoding"""
+    """Super fast version: just last 30 days, max 3 pages, batch geocoding"""
     output_path = Path(__file__).parent.parent.parent / "planit_renewables.csv"
 
     try:
@@ -128,10 +143,17 @@ if __name__ == "__main__":
         # Save to database with field mapping
         if rows:
             print(f"[PlanIt Daily] 💾 Saving {len(rows)} records to database...")
-            mapped_rows = _map_fields_for_database(rows)
-            success = db.execute_upsert("planit_renewables", mapped_rows)
+            index = IngestIndex.for_records(
+                db, "planit_renewables", [(r.get('id'), None, r.get('authority')) for r in rows]
+            )
+            mapped_rows = _map_fields_for_database(rows, index)
+            db.ensure_partitions("planit_renewables", [r.get('start_date') for r in mapped_rows])
+            success = db.execute_upsert("planit_renewables", mapped_rows, ['uid'])
             if success:
                 print(f"[PlanIt Daily] ✅ Successfully saved {len(rows)} records to database")
+                report_progress(rows_written=len(rows))
+                db.refresh_read_models("planit_renewables")
+                publish_snapshots(db, "planit_renewables")
             else:
                 print(f"[PlanIt Daily] ❌ Failed to save to database")
 
@@ -9,12 +9,12 @@ from .io import save_csv
 
 
 if __name__ == "__main__":
-    """Fast version: fetch only last complete month without geocoding for dashboard refreshes"""
+    """Fast version: fetch only last complete month for dashboard refreshes (geocoding is batched per page)"""
     output_path = Path(__file__).parent.parent.parent / "planit_renewables.csv"
 
     try:
-        print("[PlanIt Fast] Fetching only last complete month without geocoding for faster refresh...")
-        rows = fetch_major_renewables_last_complete_month(enable_geocode=False)
+        print("[PlanIt Fast] Fetching only last complete month for faster refresh...")
+        rows = fetch_major_renewables_last_complete_month()
 
         save_csv(output_path, rows)
         print(f"[PlanIt Fast] ✅ Saved {len(rows)} renewables records to {output_path}")
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 from .west_lindsey import fetch_application, normalize_application, fetch_consultations, normalize_consultation
-from .io import save_csv
+from .io import save_csv, report_progress
 
 
 APPLICATION_ID = 149857
@@ -21,4 +21,5 @@ if __name__ == "__main__":
     cons_rows = [normalize_consultation(c) for c in comments]
     save_csv(root / "west_lindsey_consultations.csv", cons_rows)
     print(f"Saved {len(cons_rows)} consultation rows to {root / 'west_lindsey_consultations.csv'}")
+    report_progress(rows_fetched=len(comments), rows_written=len(cons_rows))
 
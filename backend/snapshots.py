@@ -0,0 +1,245 @@
+"""
+Pre-serialized, pre-compressed JSON snapshots of the full read endpoints
+"""
+import functools
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from flask import request, send_file
+from flask.json.provider import DefaultJSONProvider
+
+from database import READ_MODELS
+
+try:
+    import brotli
+except ImportError:  # optional: snapshots are still published as identity + gzip
+    brotli = None
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent / "snapshots"
+
+# snapshot name -> (relation the getter reads, SupabaseDB getter returning the endpoint's full body).
+# PlanIt bodies come from the read models, so their version only moves once they are refreshed.
+SNAPSHOT_ENDPOINTS = {
+    'west_lindsey_application': ("west_lindsey_planning", "get_west_lindsey_application"),
+    'west_lindsey_consultations': ("west_lindsey_consultations", "get_west_lindsey_consultations"),
+    'peeringdb_ix_gb': ("peeringdb_ix_gb", "get_peeringdb_ix_gb"),
+    'peeringdb_fac_gb': ("peeringdb_fac_gb", "get_peeringdb_fac_gb"),
+    'planit_datacentres': ("planit_datacentres_read", "get_planit_datacentres"),
+    'planit_renewables': ("planit_renewables_read", "get_planit_renewables"),
+    'planit_renewables_test2': ("planit_renewables_read", "get_planit_renewables_test2"),
+}
+
+# Content-Encoding -> file suffix, in order of preference
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def serialize(data: Any) -> bytes:
+    """Encode exactly as jsonify does in production (sorted keys, compact, HTTP dates, trailing newline)"""
+    return json.dumps(
+        data, default=DefaultJSONProvider.default, sort_keys=True, ensure_ascii=True, separators=(",", ":")
+    ).encode("utf-8") + b"\n"
+
+
+def _version_token(version: Dict[str, Any]) -> str:
+    return f"{version.get('updated_at')}:{version.get('row_count')}"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SnapshotStore:
+    """
+    One JSON snapshot per read endpoint, written by whoever last changed its table.
+
+    Publishing serializes the endpoint's full body once and writes it plus gzip (and,
+    with the brotli package, br) variants under content-addressed names, then atomically
+    replaces `<name>.meta.json` to point at them; the previous version's files are kept
+    for readers still sending them. Serving negotiates Accept-Encoding and hands the
+    chosen file to send_file, so a request costs a manifest read and a sendfile.
+
+    A snapshot is only served while its recorded version of the relation it reads
+    matches db.table_version(). Otherwise the request falls back to the live view and
+    the first one to notice starts a background republish, which covers writes made on
+    another host (e.g. the scheduled scrapers). Those republishes compress at the
+    Compressor's levels; the maximum levels are kept for publishes the scrapers run.
+    """
+
+    def __init__(self, db, directory: Optional[str] = None):
+        self.db = db
+        self.directory = Path(directory or os.getenv('SNAPSHOT_DIR') or DEFAULT_SNAPSHOT_DIR)
+        self.enabled = os.getenv('SNAPSHOTS', '1') != '0'
+        self._locks = {name: threading.Lock() for name in SNAPSHOT_ENDPOINTS}
+        self.gzip_level = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+        self.brotli_quality = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+        self.served = 0
+        self.published = 0
+
+    def _manifest_path(self, name: str) -> Path:
+        return self.directory / f"{name}.meta.json"
+
+    def manifest(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._manifest_path(name).read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, name: str, gzip_level: int = 9, brotli_quality: int = 11) -> Optional[Dict[str, Any]]:
+        """Serialize and write snapshot `name`, returning its manifest (None on failure)"""
+        table, getter = SNAPSHOT_ENDPOINTS[name]
+        try:
+            version = self.db.table_version(table)
+            if not version:
+                print(f"[Snapshots] ❌ {name}: could not read the version of {table}")
+                return None
+            data = getattr(self.db, getter)()
+            if not data and version.get('row_count'):
+                print(f"[Snapshots] ❌ {name}: query returned nothing but {table} has rows, keeping the old snapshot")
+                return None
+
+            body = serialize(data)
+            digest = hashlib.sha1(body).hexdigest()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            files = {"identity": f"{name}.{digest[:16]}.json"}
+            variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=gzip_level, mtime=0)}
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=brotli_quality)
+            for encoding, suffix in _ENCODINGS:
+                if encoding in variants:
+                    files[encoding] = files["identity"] + suffix
+            for encoding, payload in variants.items():
+                path = self.directory / files[encoding]
+                if not path.exists():
+                    _write_atomic(path, payload)
+
+            previous = self.manifest(name) or {}
+            manifest = {
+                "name": name,
+                "version": previous.get("version", 0) + 1,
+                "source_version": _version_token(version),
+                "etag": digest,
+                "published_at": datetime.now(timezone.utc).isoformat(),
+                "rows": len(data) if isinstance(data, list) else int(bool(data)),
+                "bytes": {encoding: len(payload) for encoding, payload in variants.items()},
+                "files": files,
+                "previous_files": previous.get("files", {}),
+            }
+            _write_atomic(self._manifest_path(name), json.dumps(manifest, indent=2).encode("utf-8"))
+
+            # Files two versions back can no longer be referenced by an in-flight request
+            keep = set(files.values()) | set(manifest["previous_files"].values())
+            for stale in previous.get("previous_files", {}).values():
+                if stale not in keep:
+                    try:
+                        (self.directory / stale).unlink()
+                    except OSError:
+                        pass
+
+            self.published += 1
+            print(f"[Snapshots] ✅ {name} v{manifest['version']}: {manifest['rows']} rows, {len(body)} bytes")
+            return manifest
+        except Exception as e:
+            print(f"[Snapshots] ❌ Failed to publish {name}: {e}")
+            return None
+
+    def publish_table(self, table: str) -> List[str]:
+        """Republish every snapshot reading table or its read models; returns the names published"""
+        relations = {table, *READ_MODELS.get(table, [])}
+        return [name for name, (t, _) in SNAPSHOT_ENDPOINTS.items() if t in relations and self.publish(name)]
+
+    def current(self, name: str) -> Optional[Dict[str, Any]]:
+        """Manifest of a snapshot matching the table's current version; None (republishing in the background) if stale"""
+        table, _ = SNAPSHOT_ENDPOINTS[name]
+        version = self.db.table_version(table)
+        if not version:
+            return None
+        manifest = self.manifest(name)
+        if manifest and manifest.get("source_version") == _version_token(version):
+            return manifest
+        self._republish(name)
+        return None
+
+    def _republish(self, name: str) -> None:
+        """Start republishing `name` in a background thread, unless that's already under way"""
+        lock = self._locks[name]
+        if not lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                table, _ = SNAPSHOT_ENDPOINTS[name]
+                # Written elsewhere: make sure the rows aren't read back from this process's cache
+                self.db.invalidate(table)
+                manifest = self.manifest(name)
+                if not manifest or manifest.get("source_version") != _version_token(self.db.table_version(table)):
+                    self.publish(name, self.gzip_level, self.brotli_quality)
+            finally:
+                lock.release()
+
+        threading.Thread(target=run, name=f"snapshot-{name}", daemon=True).start()
+
+    def serve(self, name: str):
+        """Response streaming the best encoding of the current snapshot, or None to fall back"""
+        manifest = self.current(name)
+        if manifest is None:
+            return None
+        files = manifest["files"]
+        encoding = "identity"
+        for candidate, _ in _ENCODINGS:
+            if candidate in files and request.accept_encodings.quality(candidate) > 0:
+                encoding = candidate
+                break
+        path = self.directory / files[encoding]
+        if not path.exists():
+            return None
+        response = send_file(
+            path,
+            mimetype="application/json",
+            etag=f"{manifest['etag']}-{encoding}",
+            last_modified=datetime.fromisoformat(manifest["published_at"]),
+            max_age=None,
+            conditional=True,
+        )
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = "no-cache"
+        self.served += 1
+        return response
+
+    def route(self, name: str):
+        """Decorator serving a view's bare (no query string) requests from snapshot `name`"""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.enabled and not request.args:
+                    response = self.serve(name)
+                    if response is not None:
+                        return response
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "served": self.served,
+            "published": self.published,
+            "versions": {name: (self.manifest(name) or {}).get("version") for name in SNAPSHOT_ENDPOINTS},
+        }
+
+
+def publish_snapshots(db, table: str) -> List[str]:
+    """Republish the snapshots of table after a scraper wrote to it"""
+    return SnapshotStore(db).publish_table(table)
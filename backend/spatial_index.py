@@ -0,0 +1,157 @@
+"""
+Spatial index for proximity joins between PlanIt sites and PeeringDB facilities
+"""
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _unit_vector(lat: float, lng: float) -> Tuple[float, float, float]:
+    phi = math.radians(lat)
+    lam = math.radians(lng)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def _chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+
+class SpatialIndex:
+    """
+    KD-tree over points on the sphere.
+
+    Points are stored as 3D unit vectors, where straight-line (chord) distance is
+    monotonic in great-circle distance, so the usual KD-tree pruning is exact and
+    k-nearest / radius queries take logarithmic time on average.
+    """
+
+    def __init__(self, points: Iterable[Tuple[float, float, Any]]):
+        self._coords: List[Tuple[float, float, float]] = []
+        self._payloads: List[Any] = []
+        for lat, lng, payload in points:
+            self._coords.append(_unit_vector(lat, lng))
+            self._payloads.append(payload)
+        # Node = (point index, split axis, left node, right node)
+        self._root = self._build(list(range(len(self._coords))), 0)
+
+    def __len__(self) -> int:
+        return len(self._coords)
+
+    def _build(self, idxs: List[int], depth: int):
+        if not idxs:
+            return None
+        axis = depth % 3
+        idxs.sort(key=lambda i: self._coords[i][axis])
+        mid = len(idxs) // 2
+        return (idxs[mid], axis, self._build(idxs[:mid], depth + 1), self._build(idxs[mid + 1:], depth + 1))
+
+    def _dist2(self, i: int, q: Tuple[float, float, float]) -> float:
+        p = self._coords[i]
+        return (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+
+    def nearest(self, lat: float, lng: float, k: int = 1) -> List[Tuple[float, Any]]:
+        """Return up to k (distance_km, payload) pairs, closest first"""
+        q = _unit_vector(lat, lng)
+        heap: List[Tuple[float, int]] = []  # max-heap of (-dist2, idx)
+
+        def visit(node):
+            if node is None:
+                return
+            i, axis, left, right = node
+            d2 = self._dist2(i, q)
+            if len(heap) < k:
+                heapq.heappush(heap, (-d2, i))
+            elif d2 < -heap[0][0]:
+                heapq.heapreplace(heap, (-d2, i))
+            diff = q[axis] - self._coords[i][axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far)
+
+        if k > 0:
+            visit(self._root)
+        return [(_chord_to_km(math.sqrt(-d2)), self._payloads[i]) for d2, i in sorted(heap, reverse=True)]
+
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, Any]]:
+        """Return all (distance_km, payload) pairs within radius_km, closest first"""
+        q = _unit_vector(lat, lng)
+        r2 = _km_to_chord(radius_km) ** 2
+        found: List[Tuple[float, int]] = []
+
+        def visit(node):
+            if node is None:
+                return
+            i, axis, left, right = node
+            d2 = self._dist2(i, q)
+            if d2 <= r2:
+                found.append((d2, i))
+            diff = q[axis] - self._coords[i][axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if diff * diff <= r2:
+                visit(far)
+
+        visit(self._root)
+        return [(_chord_to_km(math.sqrt(d2)), self._payloads[i]) for d2, i in sorted(found)]
+
+
+def index_rows(rows: Iterable[Dict[str, Any]], lat_key: str = "latitude", lng_key: str = "longitude") -> SpatialIndex:
+    """Build an index over DB rows, skipping rows without usable coordinates"""
+    points = []
+    for row in rows:
+        lat = _to_float(row.get(lat_key))
+        lng = _to_float(row.get(lng_key))
+        if lat is not None and lng is not None:
+            points.append((lat, lng, row))
+    return SpatialIndex(points)
+
+
+def nearby_join(sites: Iterable[Dict[str, Any]], facilities: SpatialIndex, radius_km: float, limit: int = 5,
+                digits: Optional[int] = 2) -> List[Dict[str, Any]]:
+    """
+    For each site with coordinates, list the facilities within radius_km (closest first,
+    at most `limit`). Sites with no facility in range are omitted. Distances are rounded
+    to `digits` decimals (None keeps them exact).
+    """
+    joined = []
+    for site in sites:
+        lat = _to_float(site.get("latitude"))
+        lng = _to_float(site.get("longitude"))
+        if lat is None or lng is None:
+            continue
+        matches = facilities.within(lat, lng, radius_km)[:limit]
+        if not matches:
+            continue
+        joined.append({
+            "uid": site.get("uid"),
+            "name": site.get("name"),
+            "area_name": site.get("area_name"),
+            "app_state": site.get("app_state"),
+            "latitude": lat,
+            "longitude": lng,
+            "facilities": [
+                {
+                    "peeringdb_id": fac.get("peeringdb_id"),
+                    "name": fac.get("name"),
+                    "city": fac.get("city"),
+                    "distance_km": round(dist, digits) if digits is not None else dist,
+                }
+                for dist, fac in matches
+            ],
+        })
+    joined.sort(key=lambda j: j["facilities"][0]["distance_km"])
+    return joined
@@ -0,0 +1,41 @@
+-- Indexes matching the API's actual ordering and lookup patterns
+-- (see ENDPOINT_QUERIES in backend/database.py; verify with python backend/check_indexes.py)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Columns the consultations endpoint orders by (added by update_consultation_dates.py on older databases)
+ALTER TABLE west_lindsey_consultations
+    ADD COLUMN IF NOT EXISTS original_created_time TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS original_last_modified_time TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS consultation_id INTEGER,
+    ADD COLUMN IF NOT EXISTS application_id INTEGER,
+    ADD COLUMN IF NOT EXISTS response_published INTEGER,
+    ADD COLUMN IF NOT EXISTS consultee_name TEXT,
+    ADD COLUMN IF NOT EXISTS consultee_email TEXT,
+    ADD COLUMN IF NOT EXISTS consultee_address TEXT;
+
+-- Sort keys, declared with the same direction and NULLS placement as the endpoint ORDER BY
+CREATE INDEX IF NOT EXISTS idx_west_lindsey_planning_created_at ON west_lindsey_planning (created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_west_lindsey_consultations_created ON west_lindsey_consultations (original_created_time DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_peeringdb_ix_name ON peeringdb_ix_gb (name);
+CREATE INDEX IF NOT EXISTS idx_peeringdb_fac_name ON peeringdb_fac_gb (name);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_last_scraped ON planit_datacentres (last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_last_scraped ON planit_renewables (last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_start_scraped ON planit_renewables (start_date DESC NULLS LAST, last_scraped DESC NULLS LAST);
+
+-- Key lookups used by ingest dedup (select_by_keys matches uid or name)
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_name ON planit_renewables (name);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_name ON planit_datacentres (name);
+
+-- Geocode enrichment scans only rows still missing coordinates
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_missing_coords ON planit_renewables (id) WHERE latitude IS NULL OR longitude IS NULL;
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_missing_coords ON planit_datacentres (id) WHERE latitude IS NULL OR longitude IS NULL;
+
+-- Containment queries on PlanIt's free-form fields
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_other_fields ON planit_renewables USING GIN (other_fields jsonb_path_ops);
+
+-- Substring / fuzzy search on names and descriptions
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_name_trgm ON planit_renewables USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_description_trgm ON planit_renewables USING GIN (description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_name_trgm ON planit_datacentres USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_description_trgm ON planit_datacentres USING GIN (description gin_trgm_ops);
@@ -0,0 +1,75 @@
+-- Range-partition planit_renewables and planit_datacentres by start_date (one partition per year).
+-- Rows without a start_date land in a DEFAULT partition. Unique keys on a partitioned table must
+-- include the partition key, so the only key added here is (uid, start_date). That key does not
+-- keep uids unique (a corrected start_date or a NULL one never conflicts) and LIKE drops the id
+-- primary key; 007_planit_uid_integrity.sql restores both.
+
+-- Create the yearly partition covering d if it doesn't exist yet (called during ingest)
+CREATE OR REPLACE FUNCTION ensure_yearly_partition(parent TEXT, d DATE)
+RETURNS VOID AS $$
+DECLARE
+    y INTEGER := EXTRACT(YEAR FROM d);
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        parent || '_y' || y, parent, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Swap an existing table for a partitioned copy with the same columns and data (no-op once partitioned)
+CREATE OR REPLACE FUNCTION partition_by_start_date(tbl TEXT)
+RETURNS VOID AS $$
+DECLARE
+    old_tbl TEXT := tbl || '_unpartitioned';
+    y INTEGER;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = tbl::regclass) THEN
+        RETURN;
+    END IF;
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, old_tbl);
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (start_date)', tbl, old_tbl);
+    EXECUTE format('ALTER SEQUENCE %I OWNED BY %I.id', tbl || '_id_seq', tbl);
+    EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I UNIQUE (uid, start_date)', tbl, tbl || '_uid_start_date_key');
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', tbl || '_undated', tbl);
+    FOR y IN EXECUTE format(
+        'SELECT generate_series(COALESCE(MIN(EXTRACT(YEAR FROM start_date))::int, %1$s), GREATEST(COALESCE(MAX(EXTRACT(YEAR FROM start_date))::int, %1$s), %1$s + 1)) FROM %2$I',
+        EXTRACT(YEAR FROM CURRENT_DATE)::int, old_tbl
+    ) LOOP
+        PERFORM ensure_yearly_partition(tbl, make_date(y, 1, 1));
+    END LOOP;
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', tbl, old_tbl);
+    EXECUTE format('DROP TABLE %I', old_tbl);
+
+    EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', tbl);
+    EXECUTE format('CREATE POLICY "Enable read access for all users" ON %I FOR SELECT USING (true)', tbl);
+    EXECUTE format(
+        'CREATE TRIGGER %I BEFORE UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()',
+        'update_' || tbl || '_updated_at', tbl
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT partition_by_start_date('planit_renewables');
+SELECT partition_by_start_date('planit_datacentres');
+DROP FUNCTION IF EXISTS partition_by_start_date(TEXT);
+
+-- Recreate the indexes (dropped with the old tables); indexes on the parent cascade to every partition
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_uid ON planit_datacentres (uid);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_uid ON planit_renewables (uid);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_area ON planit_renewables (area_name);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_last_scraped ON planit_datacentres (last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_last_scraped ON planit_renewables (last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_start_scraped ON planit_renewables (start_date DESC NULLS LAST, last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_name ON planit_renewables (name);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_name ON planit_datacentres (name);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_missing_coords ON planit_renewables (id) WHERE latitude IS NULL OR longitude IS NULL;
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_missing_coords ON planit_datacentres (id) WHERE latitude IS NULL OR longitude IS NULL;
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_other_fields ON planit_renewables USING GIN (other_fields jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_name_trgm ON planit_renewables USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_description_trgm ON planit_renewables USING GIN (description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_name_trgm ON planit_datacentres USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_description_trgm ON planit_datacentres USING GIN (description gin_trgm_ops);
+
+-- Old partitions can later be detached cheaply, e.g.:
+--   ALTER TABLE planit_renewables DETACH PARTITION planit_renewables_y2019;
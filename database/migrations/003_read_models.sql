@@ -0,0 +1,73 @@
+-- Frontend-ready read models for the PlanIt endpoints.
+-- The API used to rename latitude/longitude/url and patch missing name/area_name in Python on
+-- every request; these materialized views hold those columns precomputed, indexed for the
+-- endpoint sort orders. Writers call SupabaseDB.refresh_read_models() after each scrape.
+-- REFRESH ... CONCURRENTLY needs a unique index, so each view keeps the base table's id.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS planit_renewables_read AS
+SELECT
+    id,
+    uid,
+    COALESCE(NULLIF(name, ''), uid, '') AS name,
+    scraper_name,
+    description,
+    address,
+    postcode,
+    url,
+    app_size,
+    app_state,
+    app_type,
+    start_date,
+    decided_date,
+    consulted_date,
+    -- Authority prefix of the uid (e.g. "EastRiding/25/02255/STPLFE" -> "EastRiding")
+    COALESCE(NULLIF(area_name, ''), NULLIF(split_part(uid, '/', 1), '')) AS area_name,
+    latitude,
+    longitude,
+    location_x,
+    location_y,
+    other_fields,
+    last_scraped,
+    last_different,
+    last_changed,
+    is_new,
+    created_at,
+    updated_at,
+    latitude AS lat,
+    longitude AS lng,
+    url AS link
+FROM planit_renewables;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_planit_renewables_read_id ON planit_renewables_read (id);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_last_scraped ON planit_renewables_read (last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_start_scraped ON planit_renewables_read (start_date DESC NULLS LAST, last_scraped DESC NULLS LAST);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS planit_datacentres_read AS
+SELECT
+    id,
+    uid,
+    name,
+    scraper_name,
+    description,
+    address,
+    postcode,
+    url,
+    app_size,
+    app_state,
+    app_type,
+    start_date,
+    decided_date,
+    area_name,
+    latitude,
+    longitude,
+    last_scraped,
+    created_at,
+    updated_at,
+    latitude AS lat,
+    longitude AS lng,
+    url AS link
+FROM planit_datacentres;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_planit_datacentres_read_id ON planit_datacentres_read (id);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_read_last_scraped ON planit_datacentres_read (last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_read_start_date ON planit_datacentres_read (start_date);
@@ -0,0 +1,26 @@
+-- Full-text search over PlanIt applications and consultee responses (served by /api/search).
+-- Weights: A = name/consultee, B = description/response text, C = address.
+-- Generated columns stay in sync on every write; on the partitioned PlanIt tables the column
+-- and its GIN index cascade to every partition.
+
+ALTER TABLE planit_renewables ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(address, '') || ' ' || coalesce(postcode, '')), 'C')
+) STORED;
+
+ALTER TABLE planit_datacentres ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(address, '') || ' ' || coalesce(postcode, '')), 'C')
+) STORED;
+
+ALTER TABLE west_lindsey_consultations ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(consultee_name, '') || ' ' || coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(consultee_address, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_search ON planit_renewables USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_search ON planit_datacentres USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_west_lindsey_consultations_search ON west_lindsey_consultations USING GIN (search_vector);
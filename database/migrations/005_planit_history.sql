@@ -0,0 +1,76 @@
+-- Append-only change history for planit_renewables.
+-- Each version stores only the columns that changed (the first version of a uid stores the
+-- full row), valid over [valid_from, valid_to). A row's state "as of" T is the ordered merge of
+-- its versions up to T, provided one of them is still open at T; deleted rows have every
+-- version closed. Bookkeeping columns that change on every scrape don't create versions.
+
+CREATE TABLE IF NOT EXISTS planit_renewables_history (
+    id BIGSERIAL PRIMARY KEY,
+    uid TEXT NOT NULL,
+    valid_from TIMESTAMP WITH TIME ZONE NOT NULL,
+    valid_to TIMESTAMP WITH TIME ZONE,
+    op CHAR(1) NOT NULL,  -- I = first/re-inserted version (full row), U = update (changed columns only)
+    changes JSONB NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_history_uid ON planit_renewables_history (uid, valid_from, valid_to);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_history_valid_from ON planit_renewables_history (valid_from);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_history_open ON planit_renewables_history (uid) WHERE valid_to IS NULL;
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_history_changes ON planit_renewables_history USING GIN (changes);
+
+-- Merge jsonb objects in aggregate order (later keys win), used to rebuild rows from diffs
+CREATE OR REPLACE AGGREGATE jsonb_merge_agg(jsonb) (
+    SFUNC = jsonb_concat,
+    STYPE = jsonb,
+    INITCOND = '{}'
+);
+
+CREATE OR REPLACE FUNCTION record_planit_renewables_history()
+RETURNS TRIGGER AS $$
+DECLARE
+    ignored TEXT[] := ARRAY['id', 'created_at', 'updated_at', 'last_scraped', 'search_vector'];
+    diff JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE planit_renewables_history SET valid_to = NOW() WHERE uid = OLD.uid AND valid_to IS NULL;
+        RETURN OLD;
+    END IF;
+
+    IF NEW.uid IS NULL THEN
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND OLD.uid IS NOT DISTINCT FROM NEW.uid THEN
+        SELECT COALESCE(jsonb_object_agg(n.key, n.value), '{}'::jsonb) INTO diff
+        FROM jsonb_each(to_jsonb(NEW)) n
+        WHERE n.key <> ALL (ignored) AND to_jsonb(OLD) -> n.key IS DISTINCT FROM n.value;
+        IF diff = '{}'::jsonb THEN
+            RETURN NEW;
+        END IF;
+        UPDATE planit_renewables_history SET valid_to = NOW() WHERE uid = NEW.uid AND valid_to IS NULL;
+        INSERT INTO planit_renewables_history (uid, valid_from, op, changes) VALUES (NEW.uid, NOW(), 'U', diff);
+    ELSE
+        -- Insert, or an update that re-keyed the row: start a fresh full version
+        IF TG_OP = 'UPDATE' THEN
+            UPDATE planit_renewables_history SET valid_to = NOW() WHERE uid = OLD.uid AND valid_to IS NULL;
+        END IF;
+        UPDATE planit_renewables_history SET valid_to = NOW() WHERE uid = NEW.uid AND valid_to IS NULL;
+        INSERT INTO planit_renewables_history (uid, valid_from, op, changes)
+        VALUES (NEW.uid, NOW(), 'I', to_jsonb(NEW) - ignored);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS record_planit_renewables_history ON planit_renewables;
+CREATE TRIGGER record_planit_renewables_history
+    AFTER INSERT OR UPDATE OR DELETE ON planit_renewables
+    FOR EACH ROW EXECUTE FUNCTION record_planit_renewables_history();
+
+-- Seed one full version per existing row so "as of" queries cover data loaded before this migration
+INSERT INTO planit_renewables_history (uid, valid_from, op, changes)
+SELECT t.uid, COALESCE(t.created_at, NOW()), 'I',
+       to_jsonb(t) - ARRAY['id', 'created_at', 'updated_at', 'last_scraped', 'search_vector']
+FROM planit_renewables t
+WHERE t.uid IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM planit_renewables_history h WHERE h.uid = t.uid);
@@ -0,0 +1,12 @@
+-- Keyset pagination indexes for the paginated PlanIt listings (SupabaseDB.get_planit_page).
+-- Pages are ordered by the endpoint sort keys and then id, so the unique id tie-breaker is
+-- part of each index and a page boundary is a single index range scan.
+
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_scraped_id ON planit_renewables_read (last_scraped DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_start_scraped_id ON planit_renewables_read (start_date DESC NULLS LAST, last_scraped DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_read_scraped_id ON planit_datacentres_read (last_scraped DESC NULLS LAST, id DESC);
+
+-- Filter columns
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_area ON planit_renewables_read (area_name);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_state_type ON planit_renewables_read (app_state, app_type);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_read_area ON planit_datacentres_read (area_name);
@@ -0,0 +1,210 @@
+-- Restore uid uniqueness and the id primary key on the partitioned PlanIt tables (see 002).
+-- 002's (uid, start_date) key let an application whose start_date was corrected upstream get a
+-- second row, and never matched rows without a start_date (NULL <> NULL), so undated
+-- applications were duplicated on every scrape. CREATE TABLE ... LIKE also dropped the id key.
+--
+-- * Undated rows store start_date = 'infinity' (the DEFAULT partition, as before). The partition
+--   key is then NOT NULL, so PRIMARY KEY (id, start_date) is possible; the read models and the
+--   history map 'infinity' back to NULL, so API responses are unchanged.
+-- * uid uniqueness across partitions is held by a plain <table>_uids table (uid PRIMARY KEY)
+--   kept by triggers: a second row for a uid fails with a unique violation.
+-- * Writers match on uid (UPDATE, then INSERT the unknown uids; SupabaseDB.bulk_upsert), so a
+--   corrected start_date updates the row, which Postgres moves to its new partition.
+
+-- Undated rows get the sentinel even when a writer sends NULL explicitly
+CREATE OR REPLACE FUNCTION planit_undated_start_date()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.start_date := COALESCE(NEW.start_date, 'infinity'::date);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Mirror uids into the key table named by TG_ARGV[0] (cloned partition triggers can't use TG_TABLE_NAME)
+CREATE OR REPLACE FUNCTION track_planit_uid()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF OLD.uid IS DISTINCT FROM NEW.uid THEN
+        IF OLD.uid IS NOT NULL THEN
+            EXECUTE format('DELETE FROM %I WHERE uid = $1', TG_ARGV[0]) USING OLD.uid;
+        END IF;
+        IF NEW.uid IS NOT NULL THEN
+            EXECUTE format('INSERT INTO %I (uid) VALUES ($1)', TG_ARGV[0]) USING NEW.uid;
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 005's history trigger, storing the sentinel as NULL. A row moved to another partition fires
+-- DELETE then INSERT, and duplicates are deleted below, so a delete only closes the uid's
+-- history once no row for it is left.
+CREATE OR REPLACE FUNCTION record_planit_renewables_history()
+RETURNS TRIGGER AS $$
+DECLARE
+    ignored TEXT[] := ARRAY['id', 'created_at', 'updated_at', 'last_scraped', 'search_vector'];
+    new_row JSONB;
+    old_row JSONB;
+    diff JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF NOT EXISTS (SELECT 1 FROM planit_renewables WHERE uid = OLD.uid) THEN
+            UPDATE planit_renewables_history SET valid_to = NOW() WHERE uid = OLD.uid AND valid_to IS NULL;
+        END IF;
+        RETURN OLD;
+    END IF;
+
+    IF NEW.uid IS NULL THEN
+        RETURN NEW;
+    END IF;
+
+    new_row := to_jsonb(NEW);
+    IF new_row ->> 'start_date' = 'infinity' THEN
+        new_row := jsonb_set(new_row, '{start_date}', 'null');
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND OLD.uid IS NOT DISTINCT FROM NEW.uid THEN
+        old_row := to_jsonb(OLD);
+        IF old_row ->> 'start_date' = 'infinity' THEN
+            old_row := jsonb_set(old_row, '{start_date}', 'null');
+        END IF;
+        SELECT COALESCE(jsonb_object_agg(n.key, n.value), '{}'::jsonb) INTO diff
+        FROM jsonb_each(new_row) n
+        WHERE n.key <> ALL (ignored) AND old_row -> n.key IS DISTINCT FROM n.value;
+        IF diff = '{}'::jsonb THEN
+            RETURN NEW;
+        END IF;
+        UPDATE planit_renewables_history SET valid_to = NOW() WHERE uid = NEW.uid AND valid_to IS NULL;
+        INSERT INTO planit_renewables_history (uid, valid_from, op, changes) VALUES (NEW.uid, NOW(), 'U', diff);
+    ELSE
+        -- Insert, or an update that re-keyed the row: start a fresh full version
+        IF TG_OP = 'UPDATE' THEN
+            UPDATE planit_renewables_history SET valid_to = NOW() WHERE uid = OLD.uid AND valid_to IS NULL;
+        END IF;
+        UPDATE planit_renewables_history SET valid_to = NOW() WHERE uid = NEW.uid AND valid_to IS NULL;
+        INSERT INTO planit_renewables_history (uid, valid_from, op, changes)
+        VALUES (NEW.uid, NOW(), 'I', new_row - ignored);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION restore_planit_uid_integrity(tbl TEXT)
+RETURNS VOID AS $$
+DECLARE
+    uids TEXT := tbl || '_uids';
+BEGIN
+    -- Keep the most recently updated row of each duplicated uid
+    EXECUTE format(
+        'DELETE FROM %1$I a USING %1$I b WHERE a.uid = b.uid'
+        ' AND (COALESCE(a.updated_at, %2$L), a.id) < (COALESCE(b.updated_at, %2$L), b.id)',
+        tbl, '-infinity'
+    );
+
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I (uid TEXT PRIMARY KEY)', uids);
+    -- Only the triggers below write here; no policy, so it isn't exposed through the REST API
+    EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', uids);
+    EXECUTE format('INSERT INTO %I (uid) SELECT DISTINCT uid FROM %I WHERE uid IS NOT NULL ON CONFLICT DO NOTHING', uids, tbl);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'track_' || tbl || '_uid', tbl);
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER INSERT OR UPDATE OF uid OR DELETE ON %I FOR EACH ROW EXECUTE FUNCTION track_planit_uid(%L)',
+        'track_' || tbl || '_uid', tbl, uids
+    );
+
+    EXECUTE format('UPDATE %I SET start_date = %L WHERE start_date IS NULL', tbl, 'infinity');
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN start_date SET DEFAULT %L', tbl, 'infinity');
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN start_date SET NOT NULL', tbl);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'set_' || tbl || '_undated', tbl);
+    EXECUTE format(
+        'CREATE TRIGGER %I BEFORE INSERT OR UPDATE OF start_date ON %I FOR EACH ROW EXECUTE FUNCTION planit_undated_start_date()',
+        'set_' || tbl || '_undated', tbl
+    );
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = tbl::regclass AND contype = 'p') THEN
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I PRIMARY KEY (id, start_date)', tbl, tbl || '_pkey');
+    END IF;
+    -- uid uniqueness now lives in the key table
+    EXECUTE format('ALTER TABLE %I DROP CONSTRAINT IF EXISTS %I', tbl, tbl || '_uid_start_date_key');
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT restore_planit_uid_integrity('planit_renewables');
+SELECT restore_planit_uid_integrity('planit_datacentres');
+DROP FUNCTION IF EXISTS restore_planit_uid_integrity(TEXT);
+
+-- Rebuild the read models (003, 006) with the sentinel mapped back to NULL
+DROP MATERIALIZED VIEW IF EXISTS planit_renewables_read;
+CREATE MATERIALIZED VIEW planit_renewables_read AS
+SELECT
+    id,
+    uid,
+    COALESCE(NULLIF(name, ''), uid, '') AS name,
+    scraper_name,
+    description,
+    address,
+    postcode,
+    url,
+    app_size,
+    app_state,
+    app_type,
+    NULLIF(start_date, 'infinity') AS start_date,
+    decided_date,
+    consulted_date,
+    -- Authority prefix of the uid (e.g. "EastRiding/25/02255/STPLFE" -> "EastRiding")
+    COALESCE(NULLIF(area_name, ''), NULLIF(split_part(uid, '/', 1), '')) AS area_name,
+    latitude,
+    longitude,
+    location_x,
+    location_y,
+    other_fields,
+    last_scraped,
+    last_different,
+    last_changed,
+    is_new,
+    created_at,
+    updated_at,
+    latitude AS lat,
+    longitude AS lng,
+    url AS link
+FROM planit_renewables;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_planit_renewables_read_id ON planit_renewables_read (id);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_last_scraped ON planit_renewables_read (last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_start_scraped ON planit_renewables_read (start_date DESC NULLS LAST, last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_scraped_id ON planit_renewables_read (last_scraped DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_start_scraped_id ON planit_renewables_read (start_date DESC NULLS LAST, last_scraped DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_area ON planit_renewables_read (area_name);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_read_state_type ON planit_renewables_read (app_state, app_type);
+
+DROP MATERIALIZED VIEW IF EXISTS planit_datacentres_read;
+CREATE MATERIALIZED VIEW planit_datacentres_read AS
+SELECT
+    id,
+    uid,
+    name,
+    scraper_name,
+    description,
+    address,
+    postcode,
+    url,
+    app_size,
+    app_state,
+    app_type,
+    NULLIF(start_date, 'infinity') AS start_date,
+    decided_date,
+    area_name,
+    latitude,
+    longitude,
+    last_scraped,
+    created_at,
+    updated_at,
+    latitude AS lat,
+    longitude AS lng,
+    url AS link
+FROM planit_datacentres;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_planit_datacentres_read_id ON planit_datacentres_read (id);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_read_last_scraped ON planit_datacentres_read (last_scraped DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_read_start_date ON planit_datacentres_read (start_date);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_read_scraped_id ON planit_datacentres_read (last_scraped DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_read_area ON planit_datacentres_read (area_name);
@@ -36,6 +36,14 @@ CREATE TABLE west_lindsey_consultations (
     consultation_end DATE,
     status TEXT,
     url TEXT,
+    original_created_time TIMESTAMP,
+    original_last_modified_time TIMESTAMP,
+    consultation_id INTEGER,
+    application_id INTEGER,
+    response_published INTEGER,
+    consultee_name TEXT,
+    consultee_email TEXT,
+    consultee_address TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -142,6 +150,7 @@ CREATE POLICY "Enable read access for all users" ON planit_datacentres FOR SELEC
 CREATE POLICY "Enable read access for all users" ON planit_renewables FOR SELECT USING (true);
 
 -- Create indexes for better performance
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 CREATE INDEX idx_west_lindsey_planning_reference ON west_lindsey_planning(reference);
 CREATE INDEX idx_planit_datacentres_uid ON planit_datacentres(uid);
 CREATE INDEX idx_planit_renewables_uid ON planit_renewables(uid);
@@ -149,6 +158,24 @@ CREATE INDEX idx_planit_renewables_area ON planit_renewables(area_name);
 CREATE INDEX idx_peeringdb_ix_peeringdb_id ON peeringdb_ix_gb(peeringdb_id);
 CREATE INDEX idx_peeringdb_fac_peeringdb_id ON peeringdb_fac_gb(peeringdb_id);
 
+-- Indexes matching API sort orders and lookups (also in migrations/001_query_indexes.sql)
+CREATE INDEX idx_west_lindsey_planning_created_at ON west_lindsey_planning(created_at DESC);
+CREATE INDEX idx_west_lindsey_consultations_created ON west_lindsey_consultations(original_created_time DESC NULLS LAST);
+CREATE INDEX idx_peeringdb_ix_name ON peeringdb_ix_gb(name);
+CREATE INDEX idx_peeringdb_fac_name ON peeringdb_fac_gb(name);
+CREATE INDEX idx_planit_datacentres_last_scraped ON planit_datacentres(last_scraped DESC NULLS LAST);
+CREATE INDEX idx_planit_renewables_last_scraped ON planit_renewables(last_scraped DESC NULLS LAST);
+CREATE INDEX idx_planit_renewables_start_scraped ON planit_renewables(start_date DESC NULLS LAST, last_scraped DESC NULLS LAST);
+CREATE INDEX idx_planit_renewables_name ON planit_renewables(name);
+CREATE INDEX idx_planit_datacentres_name ON planit_datacentres(name);
+CREATE INDEX idx_planit_renewables_missing_coords ON planit_renewables(id) WHERE latitude IS NULL OR longitude IS NULL;
+CREATE INDEX idx_planit_datacentres_missing_coords ON planit_datacentres(id) WHERE latitude IS NULL OR longitude IS NULL;
+CREATE INDEX idx_planit_renewables_other_fields ON planit_renewables USING GIN (other_fields jsonb_path_ops);
+CREATE INDEX idx_planit_renewables_name_trgm ON planit_renewables USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_planit_renewables_description_trgm ON planit_renewables USING GIN (description gin_trgm_ops);
+CREATE INDEX idx_planit_datacentres_name_trgm ON planit_datacentres USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_planit_datacentres_description_trgm ON planit_datacentres USING GIN (description gin_trgm_ops);
+
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
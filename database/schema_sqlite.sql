@@ -0,0 +1,196 @@
+-- SQLite schema for the embedded backend (DB_BACKEND=sqlite, see backend/database_sqlite.py).
+-- Mirrors schema.sql plus migrations/001 and 003 (indexes and read models). Applied on first
+-- connection, so every statement is idempotent. Dates and timestamps are stored as ISO text.
+
+CREATE TABLE IF NOT EXISTS rtpi_events (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    description TEXT,
+    event_date TEXT,
+    location TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS west_lindsey_planning (
+    id INTEGER PRIMARY KEY,
+    reference TEXT UNIQUE,
+    title TEXT,
+    description TEXT,
+    address TEXT,
+    postcode TEXT,
+    status TEXT,
+    decision TEXT,
+    received_date TEXT,
+    decided_date TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS west_lindsey_consultations (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    description TEXT,
+    consultation_start TEXT,
+    consultation_end TEXT,
+    status TEXT,
+    url TEXT,
+    original_created_time TEXT,
+    original_last_modified_time TEXT,
+    consultation_id INTEGER,
+    application_id INTEGER,
+    response_published INTEGER,
+    consultee_name TEXT,
+    consultee_email TEXT,
+    consultee_address TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS peeringdb_ix_gb (
+    id INTEGER PRIMARY KEY,
+    peeringdb_id INTEGER UNIQUE,
+    name TEXT,
+    city TEXT,
+    country TEXT,
+    region_continent TEXT,
+    latitude REAL,
+    longitude REAL,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS peeringdb_fac_gb (
+    id INTEGER PRIMARY KEY,
+    peeringdb_id INTEGER UNIQUE,
+    name TEXT,
+    city TEXT,
+    country TEXT,
+    address1 TEXT,
+    address2 TEXT,
+    zipcode TEXT,
+    latitude REAL,
+    longitude REAL,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS planit_datacentres (
+    id INTEGER PRIMARY KEY,
+    uid TEXT UNIQUE,
+    name TEXT,
+    scraper_name TEXT,
+    description TEXT,
+    address TEXT,
+    postcode TEXT,
+    url TEXT,
+    app_size TEXT,
+    app_state TEXT,
+    app_type TEXT,
+    start_date TEXT,
+    decided_date TEXT,
+    area_name TEXT,
+    latitude REAL,
+    longitude REAL,
+    last_scraped TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS planit_renewables (
+    id INTEGER PRIMARY KEY,
+    uid TEXT UNIQUE,
+    name TEXT,
+    scraper_name TEXT,
+    description TEXT,
+    address TEXT,
+    postcode TEXT,
+    url TEXT,
+    app_size TEXT,
+    app_state TEXT,
+    app_type TEXT,
+    start_date TEXT,
+    decided_date TEXT,
+    consulted_date TEXT,
+    area_name TEXT,
+    latitude REAL,
+    longitude REAL,
+    location_x REAL,
+    location_y REAL,
+    other_fields TEXT,
+    last_scraped TEXT,
+    last_different TEXT,
+    last_changed TEXT,
+    is_new INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+-- Indexes matching the API sort orders and lookups (SQLite indexes can't declare NULLS LAST)
+CREATE INDEX IF NOT EXISTS idx_west_lindsey_planning_created_at ON west_lindsey_planning (created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_west_lindsey_consultations_created ON west_lindsey_consultations (original_created_time DESC);
+CREATE INDEX IF NOT EXISTS idx_peeringdb_ix_name ON peeringdb_ix_gb (name);
+CREATE INDEX IF NOT EXISTS idx_peeringdb_fac_name ON peeringdb_fac_gb (name);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_last_scraped ON planit_datacentres (last_scraped DESC);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_last_scraped ON planit_renewables (last_scraped DESC);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_start_scraped ON planit_renewables (start_date DESC, last_scraped DESC);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_area ON planit_renewables (area_name);
+CREATE INDEX IF NOT EXISTS idx_planit_renewables_name ON planit_renewables (name);
+CREATE INDEX IF NOT EXISTS idx_planit_datacentres_name ON planit_datacentres (name);
+
+-- Read models: plain views here, since SQLite reads are local and cheap
+CREATE VIEW IF NOT EXISTS planit_renewables_read AS
+SELECT
+    id, uid,
+    COALESCE(NULLIF(name, ''), uid, '') AS name,
+    scraper_name, description, address, postcode, url, app_size, app_state, app_type,
+    start_date, decided_date, consulted_date,
+    COALESCE(NULLIF(area_name, ''), NULLIF(substr(uid, 1, instr(uid || '/', '/') - 1), '')) AS area_name,
+    latitude, longitude, location_x, location_y, other_fields,
+    last_scraped, last_different, last_changed, is_new, created_at, updated_at,
+    latitude AS lat, longitude AS lng, url AS link
+FROM planit_renewables;
+
+CREATE VIEW IF NOT EXISTS planit_datacentres_read AS
+SELECT
+    id, uid, name, scraper_name, description, address, postcode, url, app_size, app_state, app_type,
+    start_date, decided_date, area_name, latitude, longitude, last_scraped, created_at, updated_at,
+    latitude AS lat, longitude AS lng, url AS link
+FROM planit_datacentres;
+
+-- Keep updated_at current, as the Postgres triggers do
+CREATE TRIGGER IF NOT EXISTS update_planit_renewables_updated_at AFTER UPDATE ON planit_renewables
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE planit_renewables SET updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_planit_datacentres_updated_at AFTER UPDATE ON planit_datacentres
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE planit_datacentres SET updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_west_lindsey_planning_updated_at AFTER UPDATE ON west_lindsey_planning
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE west_lindsey_planning SET updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_west_lindsey_consultations_updated_at AFTER UPDATE ON west_lindsey_consultations
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE west_lindsey_consultations SET updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_peeringdb_ix_gb_updated_at AFTER UPDATE ON peeringdb_ix_gb
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE peeringdb_ix_gb SET updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_peeringdb_fac_gb_updated_at AFTER UPDATE ON peeringdb_fac_gb
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE peeringdb_fac_gb SET updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = NEW.id;
+END;
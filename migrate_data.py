@@ -15,6 +15,12 @@ import os
 sys.path.append(str(Path(__file__).parent / 'backend'))
 
 from database import db
+from snapshots import publish_snapshots
+from batch_writer import BatchWriter
+from scraper.ingest_index import IngestIndex
+
+# Checkpoints and quarantined rows for resumable REST loads
+MIGRATION_STATE_DIR = Path('.migration')
 
 def safe_float(value: str) -> Optional[float]:
     """Safely convert string to float"""
@@ -66,6 +72,45 @@ def safe_datetime(value: str) -> Optional[str]:
     except:
         return None
 
+def upsert_rows(table: str, data: List[Dict[str, Any]], conflict_columns: List[str] = None) -> bool:
+    """
+    Upsert via COPY + ON CONFLICT when a direct connection is available, else via
+    chunked, resumable Supabase REST upserts. Returns False if any row was
+    quarantined or left unwritten.
+    """
+    db.ensure_partitions(table, [row.get('start_date') for row in data])
+    if db.pool is not None and conflict_columns:
+        counts = db.bulk_upsert(table, data, conflict_columns)
+        if counts is not None:
+            print(f"{table}: {counts['inserted']} inserted, {counts['updated']} updated")
+            return True
+        print(f"{table}: bulk upsert failed, falling back to REST upsert")
+    writer = BatchWriter(
+        table,
+        lambda t, rows: db.execute_upsert(t, rows, conflict_columns),
+        checkpoint_path=MIGRATION_STATE_DIR / f"{table}.checkpoint.json",
+        quarantine_path=MIGRATION_STATE_DIR / f"{table}.quarantine.jsonl",
+    )
+    totals = writer.write(data)
+    if totals['quarantined']:
+        print(f"{table}: {totals['quarantined']} rows quarantined in {writer.quarantine_path}")
+    if totals['unwritten']:
+        print(f"{table}: {totals['unwritten']} rows not written")
+    return totals['quarantined'] == 0 and totals['unwritten'] == 0
+
+def resolve_planit_uids(table: str, rows: List[Dict[str, str]]) -> List[Optional[str]]:
+    """
+    Canonical uid of each PlanIt CSV row, resolved through IngestIndex like the scrapers do.
+    The CSVs key rows by PlanIt's name ("id"/"name") and optionally the bare uid, so an
+    application already stored under another of its aliases is updated, not duplicated.
+    """
+    candidates = [
+        (row.get('name') or row.get('id'), row.get('uid'), row.get('area_name') or row.get('authority'))
+        for row in rows
+    ]
+    index = IngestIndex.for_records(db, table, candidates)
+    return [index.resolve(*candidate)[0] for candidate in candidates]
+
 def migrate_planit_renewables():
     """Migrate PlanIt renewables data"""
     print("Migrating PlanIt renewables data...")
@@ -76,7 +121,7 @@ def migrate_planit_renewables():
         'planit_renewables_incremental.csv'
     ]
 
-    all_data = []
+    rows = []
 
     for csv_file in csv_files:
         file_path = Path(csv_file)
@@ -87,50 +132,57 @@ def migrate_planit_renewables():
         print(f"Processing {csv_file}...")
 
         with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Map CSV columns to database schema
-                data = {
-                    'uid': row.get('uid') or row.get('id'),
-                    'name': row.get('name') or row.get('title', ''),
-                    'scraper_name': row.get('scraper_name', ''),
-                    'description': row.get('description', ''),
-                    'address': row.get('address', ''),
-                    'postcode': row.get('postcode', ''),
-                    'url': row.get('url') or row.get('link', ''),
-                    'app_size': row.get('app_size', ''),
-                    'app_state': row.get('app_state', ''),
-                    'app_type': row.get('app_type', ''),
-                    'start_date': safe_date(row.get('start_date')),
-                    'decided_date': safe_date(row.get('decided_date')),
-                    'consulted_date': safe_date(row.get('consulted_date')),
-                    'area_name': row.get('area_name', ''),
-                    'latitude': safe_float(row.get('lat') or row.get('latitude')),
-                    'longitude': safe_float(row.get('lng') or row.get('longitude')),
-                    'location_x': safe_float(row.get('location_x')),
-                    'location_y': safe_float(row.get('location_y')),
-                    'last_scraped': safe_datetime(row.get('last_scraped')),
-                    'last_different': safe_datetime(row.get('last_different')),
-                    'last_changed': safe_datetime(row.get('last_changed')),
-                    'is_new': row.get('is_new', '').lower() in ('true', '1', 'yes')
-                }
-
-                # Handle other_fields as JSON
-                other_fields = row.get('other_fields', '')
-                if other_fields:
-                    try:
-                        data['other_fields'] = json.loads(other_fields)
-                    except:
-                        data['other_fields'] = {}
+            rows.extend(csv.DictReader(f))
+
+    # One row per application; a later file's copy wins
+    by_uid = {}
+    for row, uid in zip(rows, resolve_planit_uids('planit_renewables', rows)):
+        # Map CSV columns to database schema
+        data = {
+            'uid': uid,
+            # PlanIt's name ("id" in the scraper CSVs), as the scrapers store it
+            'name': row.get('name') or row.get('id') or row.get('title', ''),
+            'scraper_name': row.get('scraper_name', ''),
+            'description': row.get('description', ''),
+            'address': row.get('address', ''),
+            'postcode': row.get('postcode', ''),
+            'url': row.get('url') or row.get('link', ''),
+            'app_size': row.get('app_size', ''),
+            'app_state': row.get('app_state', ''),
+            'app_type': row.get('app_type', ''),
+            'start_date': safe_date(row.get('start_date')),
+            'decided_date': safe_date(row.get('decided_date')),
+            'consulted_date': safe_date(row.get('consulted_date')),
+            'area_name': row.get('area_name') or row.get('authority', ''),
+            'latitude': safe_float(row.get('lat') or row.get('latitude')),
+            'longitude': safe_float(row.get('lng') or row.get('longitude')),
+            'location_x': safe_float(row.get('location_x')),
+            'location_y': safe_float(row.get('location_y')),
+            'last_scraped': safe_datetime(row.get('last_scraped')),
+            'last_different': safe_datetime(row.get('last_different')),
+            'last_changed': safe_datetime(row.get('last_changed')),
+            'is_new': row.get('is_new', '').lower() in ('true', '1', 'yes')
+        }
+
+        # Handle other_fields as JSON
+        other_fields = row.get('other_fields', '')
+        if other_fields:
+            try:
+                data['other_fields'] = json.loads(other_fields)
+            except:
+                data['other_fields'] = {}
 
-                if data['uid']:  # Only add if we have a unique identifier
-                    all_data.append(data)
+        if data['uid']:  # Only add if we have a unique identifier
+            by_uid[data['uid']] = data
 
+    all_data = list(by_uid.values())
     if all_data:
         print(f"Inserting {len(all_data)} renewables records...")
-        success = db.execute_upsert('planit_renewables', all_data, ['uid'])
+        success = upsert_rows('planit_renewables', all_data, ['uid'])
         if success:
             print("✅ PlanIt renewables migration completed successfully")
+            db.refresh_read_models('planit_renewables')
+            publish_snapshots(db, 'planit_renewables')
         else:
             print("❌ PlanIt renewables migration failed")
     else:
@@ -145,37 +197,41 @@ def migrate_planit_datacentres():
         print("planit_datacentres.csv not found, skipping...")
         return
 
-    data = []
     with open(file_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            record = {
-                'uid': row.get('uid') or row.get('id'),
-                'name': row.get('name') or row.get('title', ''),
-                'scraper_name': row.get('scraper_name', ''),
-                'description': row.get('description', ''),
-                'address': row.get('address', ''),
-                'postcode': row.get('postcode', ''),
-                'url': row.get('url') or row.get('link', ''),
-                'app_size': row.get('app_size', ''),
-                'app_state': row.get('app_state', ''),
-                'app_type': row.get('app_type', ''),
-                'start_date': safe_date(row.get('start_date')),
-                'decided_date': safe_date(row.get('decided_date')),
-                'area_name': row.get('area_name', ''),
-                'latitude': safe_float(row.get('lat') or row.get('latitude')),
-                'longitude': safe_float(row.get('lng') or row.get('longitude')),
-                'last_scraped': safe_datetime(row.get('last_scraped'))
-            }
-
-            if record['uid']:
-                data.append(record)
-
+        rows = list(csv.DictReader(f))
+
+    by_uid = {}
+    for row, uid in zip(rows, resolve_planit_uids('planit_datacentres', rows)):
+        record = {
+            'uid': uid,
+            'name': row.get('name') or row.get('title', ''),
+            'scraper_name': row.get('scraper_name', ''),
+            'description': row.get('description', ''),
+            'address': row.get('address', ''),
+            'postcode': row.get('postcode', ''),
+            'url': row.get('url') or row.get('link', ''),
+            'app_size': row.get('app_size', ''),
+            'app_state': row.get('app_state', ''),
+            'app_type': row.get('app_type', ''),
+            'start_date': safe_date(row.get('start_date')),
+            'decided_date': safe_date(row.get('decided_date')),
+            'area_name': row.get('area_name', ''),
+            'latitude': safe_float(row.get('lat') or row.get('latitude')),
+            'longitude': safe_float(row.get('lng') or row.get('longitude')),
+            'last_scraped': safe_datetime(row.get('last_scraped'))
+        }
+
+        if record['uid']:
+            by_uid[record['uid']] = record
+
+    data = list(by_uid.values())
     if data:
         print(f"Inserting {len(data)} datacentre records...")
-        success = db.execute_upsert('planit_datacentres', data, ['uid'])
+        success = upsert_rows('planit_datacentres', data, ['uid'])
         if success:
             print("✅ PlanIt datacentres migration completed successfully")
+            db.refresh_read_models('planit_datacentres')
+            publish_snapshots(db, 'planit_datacentres')
         else:
             print("❌ PlanIt datacentres migration failed")
 
@@ -205,9 +261,10 @@ def migrate_west_lindsey():
                     data.append(record)
 
         if data:
-            success = db.execute_upsert('west_lindsey_planning', data, ['reference'])
+            success = upsert_rows('west_lindsey_planning', data, ['reference'])
             if success:
                 print("✅ West Lindsey planning migration completed")
+                publish_snapshots(db, 'west_lindsey_planning')
             else:
                 print("❌ West Lindsey planning migration failed")
 
@@ -229,9 +286,10 @@ def migrate_west_lindsey():
                 data.append(record)
 
         if data:
-            success = db.execute_upsert('west_lindsey_consultations', data)
+            success = upsert_rows('west_lindsey_consultations', data)
             if success:
                 print("✅ West Lindsey consultations migration completed")
+                publish_snapshots(db, 'west_lindsey_consultations')
             else:
                 print("❌ West Lindsey consultations migration failed")
 
@@ -259,9 +317,10 @@ def migrate_peeringdb():
                     data.append(record)
 
         if data:
-            success = db.execute_upsert('peeringdb_ix_gb', data, ['peeringdb_id'])
+            success = upsert_rows('peeringdb_ix_gb', data, ['peeringdb_id'])
             if success:
                 print("✅ PeeringDB IX migration completed")
+                publish_snapshots(db, 'peeringdb_ix_gb')
             else:
                 print("❌ PeeringDB IX migration failed")
 
@@ -287,9 +346,10 @@ def migrate_peeringdb():
                     data.append(record)
 
         if data:
-            success = db.execute_upsert('peeringdb_fac_gb', data, ['peeringdb_id'])
+            success = upsert_rows('peeringdb_fac_gb', data, ['peeringdb_id'])
             if success:
                 print("✅ PeeringDB Facilities migration completed")
+                publish_snapshots(db, 'peeringdb_fac_gb')
             else:
                 print("❌ PeeringDB Facilities migration failed")
 
@@ -45,35 +45,112 @@ export async function fetchPlanitRenewablesTest2() {
   return res.json();
 }
 
-// Refresh functions
+// Expand a ?format=columns response ({ columns, data, dictionaries }) back into row objects
+export function decodeColumns({ columns, data, dictionaries = {} }) {
+  const lookups = columns.map((c) => dictionaries[c]);
+  return data.map((values) => {
+    const row = {};
+    columns.forEach((c, i) => {
+      const v = values[i];
+      row[c] = lookups[i] && v !== null ? lookups[i][v] : v;
+    });
+    return row;
+  });
+}
 
-export async function refreshWestLindsey() {
-  const res = await fetch(`${API_BASE}/refresh/west-lindsey`, { method: 'POST' });
-  if (!res.ok) throw new Error('Failed to refresh West Lindsey');
-  return res.json();
+// Compact columnar fetch of a PlanIt listing ('datacentres', 'renewables', 'renewables-test2')
+export async function fetchPlanitColumns(listing, params = {}) {
+  const query = new URLSearchParams({ ...params, format: 'columns' });
+  const res = await fetch(`${API_BASE}/planit/${listing}?${query}`);
+  if (!res.ok) throw new Error(`Failed to fetch PlanIt ${listing}`);
+  return decodeColumns(await res.json());
 }
 
-export async function refreshPeeringdbFac() {
-  const res = await fetch(`${API_BASE}/refresh/peeringdb-fac`, { method: 'POST' });
-  if (!res.ok) throw new Error('Failed to refresh PeeringDB Facilities');
+export async function searchRecords(q, { source = '', limit = 20, offset = 0 } = {}) {
+  const params = new URLSearchParams({ q, limit: String(limit), offset: String(offset) });
+  if (source) params.set('source', source);
+  const res = await fetch(`${API_BASE}/search?${params}`);
+  if (!res.ok) throw new Error('Failed to search records');
   return res.json();
 }
 
-export async function refreshPlanitDatacentres() {
-  const res = await fetch(`${API_BASE}/refresh/planit-dc`, { method: 'POST' });
-  if (!res.ok) throw new Error('Failed to refresh PlanIt datacentres');
-  return res.json();
+// Download link for a whole table, streamed as NDJSON or CSV
+export function exportUrl(table, format = 'csv') {
+  return `${API_BASE}/export/${table}?format=${format}`;
 }
 
-export async function refreshPlanitRenewables() {
-  const res = await fetch(`${API_BASE}/refresh/planit-renew`, { method: 'POST' });
-  if (!res.ok) throw new Error('Failed to refresh PlanIt renewables');
-  return res.json();
+// Refresh functions
+
+// Follow a refresh job until it finishes, reporting progress; resolves with the job's result
+export function waitForJob(jobId, onProgress) {
+  return new Promise((resolve, reject) => {
+    const poll = async () => {
+      try {
+        const res = await fetch(`${API_BASE}/jobs/${jobId}`);
+        if (!res.ok) throw new Error('Failed to fetch refresh job');
+        const job = await res.json();
+        if (onProgress) onProgress(job);
+        if (job.result) resolve(job.result);
+        else setTimeout(poll, 2000);
+      } catch (e) {
+        reject(e);
+      }
+    };
+    if (typeof EventSource === 'undefined') {
+      poll();
+      return;
+    }
+    const events = new EventSource(`${API_BASE}/jobs/${jobId}/events`);
+    events.addEventListener('progress', (e) => onProgress && onProgress(JSON.parse(e.data)));
+    events.addEventListener('done', (e) => {
+      events.close();
+      const job = JSON.parse(e.data);
+      if (onProgress) onProgress(job);
+      resolve(job.result);
+    });
+    // Fall back to polling if the event stream drops
+    events.onerror = () => {
+      events.close();
+      poll();
+    };
+  });
 }
 
-export async function refreshPlanitRenewablesTest2() {
-  const res = await fetch(`${API_BASE}/refresh/planit-test2`, { method: 'POST' });
-  if (!res.ok) throw new Error('Failed to refresh PlanIt renewables test2');
-  return res.json();
+// Start (or join) a refresh and wait for it; the CSV API still answers synchronously
+export async function refreshSource(source, onProgress) {
+  const res = await fetch(`${API_BASE}/refresh/${source}`, { method: 'POST' });
+  const body = await res.json();
+  if (res.status !== 202) return body;
+  if (onProgress) onProgress(body.job);
+  return waitForJob(body.job.id, onProgress);
+}
+
+// One-line summary of a job's progress counters, for status messages
+export function describeProgress(job) {
+  const p = job.progress || {};
+  const parts = [];
+  if (p.pages) parts.push(p.pages_total ? `page ${p.pages}/${p.pages_total}` : `${p.pages} pages`);
+  if (p.rows_fetched != null) parts.push(`${p.rows_fetched} fetched`);
+  if (p.rows_written != null) parts.push(`${p.rows_written} written`);
+  return `${job.status}${parts.length ? ': ' + parts.join(', ') : ''} (${job.elapsed_s}s)`;
 }
 
+export function refreshWestLindsey(onProgress) {
+  return refreshSource('west-lindsey', onProgress);
+}
+
+export function refreshPeeringdbFac(onProgress) {
+  return refreshSource('peeringdb-fac', onProgress);
+}
+
+export function refreshPlanitDatacentres(onProgress) {
+  return refreshSource('planit-dc', onProgress);
+}
+
+export function refreshPlanitRenewables(onProgress) {
+  return refreshSource('planit-renew', onProgress);
+}
+
+export function refreshPlanitRenewablesTest2(onProgress) {
+  return refreshSource('planit-test2', onProgress);
+}